@@ -0,0 +1,117 @@
+import hashlib
+import os
+import random
+import struct
+from typing import Tuple
+
+from players import normalize_name
+
+ADAPTIVE_DIR = "adaptive"
+
+OPS = ("add", "sub", "mul", "div")
+# faixas de números ("números até N") por onde o modo adaptativo anda
+RANGES = (5, 10, 20, 30, 50, 100)
+
+ALPHA = 0.2            # peso da resposta nova nas médias exponenciais
+MIN_SAMPLES = 5        # respostas numa faixa antes de poder subir
+MASTERED_ACC = 0.85    # acerto (média exponencial) pra considerar a faixa dominada
+TARGET_MS = 6000       # e tempo médio de resposta abaixo disso
+
+# por célula (operação × faixa): respostas, acertos, acerto médio, tempo médio (ms)
+CELL = struct.Struct("<IIff")
+CELLS = len(OPS) * len(RANGES)
+
+
+def question_code(op: str, range_idx: int) -> int:
+    # 1 byte por questão no replay: operação + faixa
+    return OPS.index(op) + len(OPS) * range_idx
+
+
+def decode_question(code: int) -> Tuple[str, int]:
+    return OPS[code % len(OPS)], code // len(OPS)
+
+
+# ----------------------------
+# Estatísticas por jogador
+# ----------------------------
+class AdaptiveStats:
+    # Estatística corrida por jogador × operação × faixa, em arrays de
+    # tamanho fixo: atualizar uma resposta e escolher a próxima questão
+    # custam O(1), não importa quantas partidas o jogador já tem.
+    # Gravado em 384 bytes por jogador.
+
+    def __init__(self, name: str, path: str = ADAPTIVE_DIR):
+        self.name = name
+        self.path = path
+        self.count = [0] * CELLS
+        self.correct = [0] * CELLS
+        self.acc = [0.0] * CELLS
+        self.ms = [0.0] * CELLS
+        self._load()
+
+    def _file(self) -> str:
+        key = hashlib.sha1(normalize_name(self.name).encode("utf-8")).hexdigest()[:20]
+        return os.path.join(self.path, key + ".bin")
+
+    def _load(self) -> None:
+        fname = self._file()
+        if not os.path.exists(fname):
+            return
+        with open(fname, "rb") as f:
+            buf = f.read()
+        if len(buf) != CELL.size * CELLS:
+            return  # arquivo de outra versão/corrompido: recomeça
+        for i, (n, c, acc, ms) in enumerate(CELL.iter_unpack(buf)):
+            self.count[i], self.correct[i], self.acc[i], self.ms[i] = n, c, acc, ms
+
+    def save(self) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        buf = b"".join(CELL.pack(self.count[i], self.correct[i], self.acc[i], self.ms[i])
+                       for i in range(CELLS))
+        tmp = self._file() + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(buf)
+        os.replace(tmp, self._file())
+
+    def update(self, op: str, range_idx: int, correct: bool, elapsed_ms: int) -> None:
+        i = question_code(op, range_idx)
+        n = self.count[i]
+        self.count[i] = n + 1
+        self.correct[i] += correct
+        if n == 0:
+            self.acc[i] = float(correct)
+            self.ms[i] = float(elapsed_ms)
+        else:
+            self.acc[i] += ALPHA * (float(correct) - self.acc[i])
+            self.ms[i] += ALPHA * (elapsed_ms - self.ms[i])
+
+    def _mastered(self, i: int) -> bool:
+        return (self.count[i] >= MIN_SAMPLES and self.acc[i] >= MASTERED_ACC
+                and self.ms[i] <= TARGET_MS)
+
+    def level(self, op: str) -> int:
+        # primeira faixa ainda não dominada (se errar muito numa faixa de
+        # baixo, a média cai e o jogador volta pra ela)
+        for r in range(len(RANGES)):
+            if not self._mastered(question_code(op, r)):
+                return r
+        return len(RANGES) - 1
+
+    def weakness(self, op: str) -> float:
+        i = question_code(op, self.level(op))
+        if self.count[i] == 0:
+            return 1.0
+        slow = min(self.ms[i] / TARGET_MS, 2.0)
+        return 0.25 + (1.0 - self.acc[i]) + 0.5 * slow
+
+    def pick(self, mode_key: str, rng: random.Random) -> Tuple[str, int]:
+        # operação (no misto, pesa mais onde o jogador erra/demora) e faixa
+        if mode_key != "mix":
+            return mode_key, self.level(mode_key)
+        weights = [self.weakness(op) for op in OPS]
+        x = rng.random() * sum(weights)
+        for op, w in zip(OPS, weights):
+            x -= w
+            if x < 0:
+                break
+        return op, self.level(op)
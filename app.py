@@ -1,648 +1,772 @@
+import time
+
+_T_START = time.perf_counter()
+
+import gzip
+import hashlib
+import multiprocessing
 import os
-from flask import Flask
+import queue
+import secrets
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+from flask import Flask, Response, jsonify, request
+
+import engine
+import main
+import replay
+import tokens
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele só gzip
+    brotli = None
+
+_T_IMPORTS = time.perf_counter()
+
+# sem a pasta static/ padrão: os assets do jogo saem de /assets (ver build_assets)
+app = Flask(__name__, static_folder=None)
+# a chave assina os tokens das partidas (com o placar dentro): nunca uma
+# chave fixa conhecida. Sem SECRET_KEY, sorteia uma na subida; com o
+# preload_app do gunicorn todos os workers herdam a mesma, mas as partidas
+# em andamento se perdem a cada restart.
+app.secret_key = os.environ.get("SECRET_KEY") or secrets.token_hex(32)
+if "SECRET_KEY" not in os.environ:
+    print("aviso: SECRET_KEY não definida, usando uma chave aleatória", file=sys.stderr)
+
+_T_APP = time.perf_counter()
+
+_data = None
+_data_lock = threading.Lock()
+
+
+def ranking_data():
+    # rankings do mesmo store do jogo de terminal, carregados uma vez por worker
+    # (a primeira leva de requisições chega junta: só uma thread carrega);
+    # o que outros processos gravam depois entra pelo sync_store
+    global _data, _store_seen
+    if _data is None:
+        with _data_lock:
+            if _data is None:
+                # versão antes da carga: gravação no meio só causa um recarregamento
+                _store_seen = main.store_version()
+                _data = main.load_data(lazy=True)
+    return _data
+
+
+@app.get("/api/players")
+def api_players():
+    # autocomplete de nomes: /api/players?prefix=br&limit=10
+    prefix = request.args.get("prefix", "")
+    limit = max(1, min(request.args.get("limit", 10, type=int), 100))
+    sync_store()
+    registry = main.player_registry(ranking_data())
+    return jsonify({"prefix": prefix, "players": registry.search(prefix, limit)})
+
+
+# ----------------------------
+# Questões em lote
+# ----------------------------
+MAX_ROUNDS = 100
+_MAX_NUMBERS = {max_n for _, max_n in main.DIFFICULTIES.values() if max_n}
+# tempos por questão aceitos: os do jogo de terminal + os da página (0 = sem
+# tempo); o bônus de velocidade do calc_points cresce com o limite
+_TIME_LIMITS = {0, 8} | {tl for _, tl in main.TIME_MODES.values() if tl}
+
+
+@lru_cache(maxsize=4096)
+def game_questions(mode_key: str, max_n: int, rounds: int, seed: int) -> Tuple[Tuple[str, int], ...]:
+    # mesmo gerador (e mesma seed) do jogo de terminal: a partida web pode ser
+    # conferida depois com replay.verify
+    sampler = main.QuestionSampler(mode_key, max_n, replay.question_rng(seed))
+    return tuple(sampler.next() for _ in range(rounds))
+
+
+@lru_cache(maxsize=1024)
+def question_batch(mode_key: str, max_n: int, rounds: int, seed: int) -> bytes:
+    qs = game_questions(mode_key, max_n, rounds, seed)
+    body = {"seed": f"{seed:016x}", "mode": mode_key, "max": max_n, "q": qs}
+    return app.json.dumps(body, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+@app.get("/api/questions")
+def api_questions():
+    # a partida inteira numa resposta: /api/questions?mode=mix&max=10&n=30[&seed=hex]
+    # q = [[texto, resposta], ...]. Com seed o conteúdo nunca muda -> cache longo.
+    mode_key = request.args.get("mode", "mix")
+    max_n = request.args.get("max", 10, type=int)
+    rounds = request.args.get("n", 10, type=int)
+    seed_arg = request.args.get("seed")
+    if mode_key not in main.OPS + ("mix",) or max_n not in _MAX_NUMBERS:
+        return jsonify({"error": "modo ou dificuldade inválidos"}), 400
+    if not 1 <= rounds <= MAX_ROUNDS:
+        return jsonify({"error": f"n deve estar entre 1 e {MAX_ROUNDS}"}), 400
+    if seed_arg is None:
+        seed = replay.new_seed()
+    else:
+        try:
+            seed = int(seed_arg, 16)
+        except ValueError:
+            seed = -1
+        if not 0 <= seed < 1 << 64:
+            return jsonify({"error": "seed inválida"}), 400
+
+    resp = Response(question_batch(mode_key, max_n, rounds, seed), mimetype="application/json")
+    if seed_arg is None:
+        # seed sorteada agora: cada pedido é uma partida nova
+        resp.headers["Cache-Control"] = "no-store"
+        return resp
+    resp.set_etag(hashlib.sha1(resp.get_data()).hexdigest()[:16])
+    resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return resp.make_conditional(request)
+
+
+# ----------------------------
+# Partida com tokens assinados
+# ----------------------------
+# Cada questão servida leva um token HMAC com o estado da partida (nonce,
+# índice, hora de emissão, placar). O servidor confere resposta e tempo só
+# com o token: nada guardado por sessão, qualquer worker atende.
+signer = tokens.TokenSigner(app.secret_key)
+ANSWER_SLACK_MS = 1000  # ida e volta da rede antes de contar como tempo esgotado
+
+
+@app.get("/api/game")
+def api_game():
+    # /api/game?mode=mix&max=10&n=10&time_limit=5&name=Ana -> textos das questões
+    # + token da 1ª; as respostas só saem do /api/answer, depois de respondida
+    mode_key = request.args.get("mode", "mix")
+    max_n = request.args.get("max", 10, type=int)
+    rounds = request.args.get("n", 10, type=int)
+    time_limit = request.args.get("time_limit", 0, type=int)
+    if mode_key not in main.OPS + ("mix",) or max_n not in _MAX_NUMBERS:
+        return jsonify({"error": "modo ou dificuldade inválidos"}), 400
+    if not 1 <= rounds <= MAX_ROUNDS:
+        return jsonify({"error": f"n deve estar entre 1 e {MAX_ROUNDS}"}), 400
+    if time_limit not in _TIME_LIMITS:
+        opts = ", ".join(map(str, sorted(_TIME_LIMITS)))
+        return jsonify({"error": f"time_limit deve ser um de: {opts}"}), 400
+
+    nonce = replay.new_seed()
+    qs = game_questions(mode_key, max_n, rounds, signer.game_seed(nonce))
+    # o nome entra no token: a partida só pode ir pro ranking com ele
+    tok = tokens.GameToken(nonce, mode_key, max_n, time_limit, rounds, 0, tokens.now_ms(),
+                           name_tag=tokens.name_tag(request.args.get("name", "")))
+    resp = jsonify({"mode": mode_key, "max": max_n, "time_limit": time_limit,
+                    "q": [text for text, _ in qs], "token": signer.sign(tok)})
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
+@app.post("/api/answer")
+def api_answer():
+    # {"token": ..., "answer": 42 | null} -> resultado + token da próxima questão
+    # {"token": ..., "forfeit": true} -> encerra com o placar atual (sem vidas,
+    # desistiu): o token volta com index == rounds, pronto pro /api/scores
+    body = request.get_json(silent=True) or {}
+    try:
+        tok = signer.verify(str(body.get("token", "")))
+    except tokens.InvalidToken as e:
+        return jsonify({"error": str(e)}), 403
+    if tok.index >= tok.rounds:
+        return jsonify({"error": "partida já terminou"}), 409
+    if body.get("forfeit") is True:
+        # não consome a questão: encerrar não pontua, e a partida só entra
+        # no ranking uma vez (claim do nonce no /api/scores)
+        end = tok.forfeit()
+        return jsonify({"index": tok.index, "score": tok.score,
+                        "level": main.level_from_score(tok.score), "token": signer.sign(end)})
+    # cada questão só pode ser respondida uma vez: sem isso, o mesmo token
+    # seria reenviado com outra resposta até acertar
+    with _write_lock:
+        expires = (tok.issued_ms + tokens.TOKEN_TTL_MS) // 1000 + 1
+        if not main.claim_game(f"{tok.nonce:016x}:{tok.index}", expires):
+            return jsonify({"error": "questão já respondida"}), 409
+
+    seed = signer.game_seed(tok.nonce)
+    qs = game_questions(tok.mode_key, tok.max_number, tok.rounds, seed)
+    # mesmas regras do jogo de terminal, retomando do estado que veio no token
+    game = engine.GameEngine(tok.mode_key, tok.max_number, tok.time_limit or None, tok.rounds,
+                             seed=seed, grace_ms=ANSWER_SLACK_MS)
+    game.resume(tok.index, tok.score, tok.streak, tok.correct, qs[tok.index])
+    # tempo medido pelo servidor: desde a emissão do token desta questão
+    elapsed_ms = max(0, tokens.now_ms() - tok.issued_ms)
+    answer = body.get("answer")
+    raw = str(answer) if isinstance(answer, int) and not isinstance(answer, bool) else None
+    res = game.answer(raw, elapsed_ms)
+
+    nxt = tok.advance(score=game.score, streak=game.streak, correct=game.correct_count)
+    return jsonify({
+        "index": tok.index,
+        "correct": res.kind == engine.CORRECT,
+        "timeout": res.kind == engine.TIMEOUT,
+        "expected": res.expected,
+        "gained": res.gained,
+        "elapsed_ms": elapsed_ms,
+        "score": game.score,
+        "level": game.level,
+        "token": signer.sign(nxt),
+    })
+
+
+# ----------------------------
+# Envio da partida inteira
+# ----------------------------
+# Uma requisição por partida: o cliente manda (resposta, ms) de cada questão
+# junto com o token da partida; o servidor joga a partida de novo com o
+# GameEngine (regera as questões pela seed, pontua, grava o replay) num pool
+# de processos, fora das threads que atendem requisições.
+VERIFY_WORKERS = int(os.environ.get("MATE_VERIFY_WORKERS", "2"))
+VERIFY_TIMEOUT = 10.0
+# limites pros tempos informados pelo cliente: ninguém lê e digita a conta em
+# menos que MIN_ANSWER_MS, e entre uma questão e outra (resultado na tela,
+# próxima aparecendo) não se perde mais que ROUND_OVERHEAD_MS
+MIN_ANSWER_MS = 250
+ROUND_OVERHEAD_MS = 1000
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def verify_pool() -> ProcessPoolExecutor:
+    # criado no primeiro uso (depois do fork do gunicorn); "spawn" porque dar
+    # fork num worker com threads pode herdar locks travados
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(VERIFY_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def record_web_game(name: str, tok: tokens.GameToken, score: int, ts: int,
+                    game_id: Optional[str] = None) -> Optional[Dict]:
+    # com game_id, devolve None se essa partida já foi gravada antes
+    global _version, _store_seen
+    data = ranking_data()
+    with _write_lock:
+        expires = (tok.issued_ms + tokens.TOKEN_TTL_MS) // 1000 + 1
+        if game_id is not None and not main.claim_game(game_id, expires):
+            return None
+        # o que outros processos gravaram entra antes, senão a versão lida
+        # depois desta gravação esconderia as partidas deles
+        seen = main.store_version()
+        if seen != _store_seen:
+            _reload_store(seen)
+        name = main.player_registry(data).add(name)
+        entry = {
+            "name": name,
+            "score": score,
+            "mode": _MODE_LABELS[tok.mode_key],
+            "difficulty": _DIFF_LABELS.get(tok.max_number, f"até {tok.max_number}"),
+            "mode_key": tok.mode_key,
+            "time_limit": tok.time_limit or None,
+            "rounds": tok.rounds,
+            "ts": ts,
+        }
+        main.record_result(data, entry, top_n=RANKING_LIMIT)
+        _store_seen = main.store_version()
+        _version += 1
+        bests = data["best_by_player"]
+        return {"name": name, "score": score, "best": bests.get(name, 0),
+                "rank": bests.rank(name), "players": len(bests)}
+
+
+@app.post("/api/games")
+def api_games():
+    # {"name": ..., "token": <token da /api/game>, "answers": [[42, 1830], [null, 5001], ...]}
+    body = request.get_json(silent=True) or {}
+    name = tokens.normalize_name(body.get("name", ""))
+    named = len(name) >= 2   # sem nome: só confere, não grava
+    answers = body.get("answers")
+    try:
+        tok = signer.verify(str(body.get("token", "")))
+    except tokens.InvalidToken as e:
+        return jsonify({"error": str(e)}), 403
+    if named and tokens.name_tag(name) != tok.name_tag:
+        return jsonify({"error": "partida de outro jogador"}), 403
+    if tok.index != 0:
+        return jsonify({"error": "use o token do início da partida"}), 400
+    if not isinstance(answers, list) or not 1 <= len(answers) <= tok.rounds:
+        return jsonify({"error": f"answers deve ter de 1 a {tok.rounds} itens"}), 400
+    clean = []
+    for item in answers:
+        if not (isinstance(item, list) and len(item) == 2):
+            return jsonify({"error": "cada item é [resposta, ms]"}), 400
+        answer, ms = item
+        if answer is not None and (not isinstance(answer, int) or isinstance(answer, bool)):
+            return jsonify({"error": "resposta deve ser inteiro ou null"}), 400
+        if not isinstance(ms, int) or isinstance(ms, bool) or ms < 0:
+            return jsonify({"error": "tempo deve ser inteiro em ms"}), 400
+        if answer is not None and ms < MIN_ANSWER_MS:
+            return jsonify({"error": "resposta rápida demais"}), 400
+        clean.append((answer, ms))
+    # a soma dos tempos tem que bater com o relógio do servidor: não mais do
+    # que passou desde a emissão do token, nem muito menos (tempos zerados
+    # pra ganhar bônus de velocidade)
+    wall_ms = tokens.now_ms() - tok.issued_ms
+    spent = sum(ms for _, ms in clean)
+    if not wall_ms - ROUND_OVERHEAD_MS * len(clean) - ANSWER_SLACK_MS <= spent <= wall_ms + ANSWER_SLACK_MS:
+        return jsonify({"error": "tempos incompatíveis com a duração da partida"}), 400
+
+    ts = tok.issued_ms // 1000
+    global _pool
+    pool = verify_pool()
+    try:
+        fut = pool.submit(
+            engine.play_answers, tok.mode_key, tok.max_number, tok.time_limit or None,
+            tok.rounds, signer.game_seed(tok.nonce), clean, name, ts if named else None)
+        res = fut.result(timeout=VERIFY_TIMEOUT)
+    except BrokenProcessPool:
+        # um processo do pool morreu: o próximo envio cria outro pool
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        return jsonify({"error": "conferência indisponível, tente de novo"}), 503
+    except FuturesTimeout:
+        return jsonify({"error": "conferência demorou demais, tente de novo"}), 503
+
+    out = {"score": res["score"], "correct": res["correct"], "played": res["played"],
+           "level": res["level"]}
+    if named:
+        rec = record_web_game(name, tok, res["score"], ts, game_id=f"{tok.nonce:016x}")
+        if rec is None:
+            return jsonify({"error": "partida já enviada"}), 409
+        out.update(rec)
+    return jsonify(out), 201
+
+
+# ----------------------------
+# Ranking global
+# ----------------------------
+RANKING_LIMIT = 20  # mesmo tamanho de ranking que o jogo de terminal guarda
+_MODE_LABELS = {key: label for label, key in main.MODES.values()}
+_DIFF_LABELS = {max_n: label for label, max_n in main.DIFFICULTIES.values() if max_n}
+
+# toda partida gravada sobe a versão; as respostas serializadas ficam em
+# cache até a versão mudar (o ETag é o hash do corpo)
+_version = 0
+_write_lock = threading.Lock()
+_cache: Dict[Tuple, Tuple[int, bytes, str]] = {}
+
+# Com vários workers (ou o jogo de terminal) no mesmo store, cada worker só
+# vê na memória o que ele mesmo gravou. A versão do store (sqlite: maior id;
+# json: tamanho/mtime do snapshot e do journal) é conferida no máximo a cada
+# STORE_POLL segundos; mudou por outro processo, recarrega.
+STORE_POLL = 2.0
+_store_seen: Optional[Tuple[int, ...]] = None
+_store_checked = 0.0
+
+
+def _reload_store(seen: Tuple[int, ...]) -> None:
+    # com _write_lock: troca a visão pelo store inteiro e publica o que mudou
+    global _store_seen, _version
+    data = ranking_data()
+    data.update(main.load_data())
+    if isinstance(data, main.LazyData):
+        data.loaded = True
+    registry = main.player_registry(data)
+    for name in data["best_by_player"]:
+        registry.add(name)   # nomes que só outro processo tinha visto
+    _store_seen = seen
+    publish_live(data, _MODE_KEYS.values())
+    _version += 1
+
+
+def sync_store() -> None:
+    global _store_checked
+    now = time.monotonic()
+    if now - _store_checked < STORE_POLL:
+        return
+    _store_checked = now
+    ranking_data()
+    with _write_lock:
+        seen = main.store_version()
+        if seen != _store_seen:
+            _reload_store(seen)
+
+
+def _cached_json(key: Tuple, build) -> Response:
+    hit = _cache.get(key)
+    if hit is None or hit[0] != _version:
+        version = _version
+        body = app.json.dumps(build(), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        hit = _cache[key] = (version, body, hashlib.sha1(body).hexdigest()[:16])
+    resp = Response(hit[1], mimetype="application/json")
+    resp.set_etag(hit[2])
+    # o navegador pode guardar, mas sempre revalida (304 se nada mudou)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp.make_conditional(request)
+
+
+@app.post("/api/scores")
+def api_scores():
+    # {"name": ..., "token": <último token da partida>}: o placar vem assinado
+    # pelo /api/answer, o cliente não informa pontos
+    body = request.get_json(silent=True) or {}
+    name = tokens.normalize_name(body.get("name", ""))
+    if len(name) < 2:
+        return jsonify({"error": "nome precisa de 2 letras ou mais"}), 400
+    try:
+        tok = signer.verify(str(body.get("token", "")))
+    except tokens.InvalidToken as e:
+        return jsonify({"error": str(e)}), 403
+    if tokens.name_tag(name) != tok.name_tag:
+        return jsonify({"error": "partida de outro jogador"}), 403
+    if tok.index != tok.rounds:
+        return jsonify({"error": "partida ainda não terminou"}), 400
+
+    out = record_web_game(name, tok, tok.score, tok.issued_ms // 1000, game_id=f"{tok.nonce:016x}")
+    if out is None:
+        return jsonify({"error": "partida já enviada"}), 409
+    return jsonify(out), 201
+
+
+@app.get("/api/rankings")
+def api_rankings():
+    # /api/rankings?view=overall|mode|players|daily|weekly[&mode=add][&limit=20]
+    view = request.args.get("view", "overall")
+    limit = max(1, min(request.args.get("limit", 20, type=int), RANKING_LIMIT))
+    sync_store()
+    data = ranking_data()
+    if view == "overall":
+        return _cached_json((view, limit), lambda: {
+            "view": view, "entries": data["overall"].top(limit)})
+    if view == "mode":
+        mode_key = request.args.get("mode", "mix")
+        if mode_key not in _MODE_LABELS:
+            return jsonify({"error": "modo inválido"}), 400
+        label = _MODE_LABELS[mode_key]
+        return _cached_json((view, mode_key, limit), lambda: {
+            "view": view, "mode": mode_key,
+            "entries": list(data["by_mode"].get(label, []))[:limit]})
+    if view == "players":
+        return _cached_json((view, limit), lambda: {
+            "view": view, "players": len(data["best_by_player"]),
+            "entries": [{"name": n, "score": sc} for n, sc in data["best_by_player"].top(limit)]})
+    if view in ("daily", "weekly"):
+        # o balde (dia/semana) entra na chave: virou o dia, o cache não serve
+        now = main.now_ts()
+        bucket = main.day_key(now) if view == "daily" else main.week_key(now)
+        return _cached_json((view, bucket, limit), lambda: {
+            "view": view, "entries": data[view].top(limit, now)})
+    return jsonify({"error": "view deve ser overall, mode, players, daily ou weekly"}), 400
+
+
+# ----------------------------
+# Ranking ao vivo (Server-Sent Events)
+# ----------------------------
+# Em vez de cada aba ficar consultando /api/rankings, um stream por aba:
+# ao conectar vem o ranking inteiro uma vez; depois, a cada partida que mexe
+# num top, só as posições que mudaram. O evento é serializado uma vez e
+# enfileirado para cada inscrito (O(inscritos) escritas pequenas).
+# Cada stream ocupa uma thread do gunicorn (ver gunicorn.conf.py).
+MAX_STREAMS = int(os.environ.get("MATE_MAX_STREAMS", "200"))
+STREAM_QUEUE = 32        # eventos pendentes por cliente antes de derrubá-lo
+STREAM_KEEPALIVE = 15.0  # segundos entre comentários de keep-alive
+_MODE_KEYS = {label: key for key, label in _MODE_LABELS.items()}
+
+
+class Broadcaster:
+    # Fila limitada por inscrito. Cliente lento (fila cheia) é derrubado em vez
+    # de segurar quem publica ou acumular memória: recebe um "reset" e o
+    # navegador reconecta, pegando o ranking inteiro de novo.
+
+    def __init__(self, max_subscribers: int = MAX_STREAMS, queue_size: int = STREAM_QUEUE):
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._subs: Set[queue.Queue] = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._subs)
+
+    def subscribe(self) -> Optional[queue.Queue]:
+        with self._lock:
+            if len(self._subs) >= self.max_subscribers:
+                return None
+            q: queue.Queue = queue.Queue(self.queue_size)
+            self._subs.add(q)
+            return q
+
+    def unsubscribe(self, q: queue.Queue) -> None:
+        with self._lock:
+            self._subs.discard(q)
+
+    def publish(self, event: bytes) -> None:
+        with self._lock:
+            subs = list(self._subs)
+        for q in subs:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                self.unsubscribe(q)
+                self.dropped += 1
+                # esvazia e deixa só o aviso: o cliente não perde nada, recomeça
+                try:
+                    while True:
+                        q.get_nowait()
+                except queue.Empty:
+                    pass
+                q.put_nowait(None)
+
+
+broadcaster = Broadcaster()
+_live: Optional[Dict] = None   # último estado publicado, para calcular o delta
+
+
+def _live_row(e: Dict) -> Dict:
+    # partidas antigas (antes da configuração completa) não têm "rounds"
+    return {"name": e["name"], "score": e["score"], "mode": e["mode"],
+            "difficulty": e["difficulty"], "rounds": e.get("rounds")}
+
+
+def live_state(data: Dict) -> Dict:
+    # mesmo conteúdo do /api/rankings (overall, mode, players), enxuto
+    return {
+        "overall": [_live_row(e) for e in data["overall"].top(RANKING_LIMIT)],
+        "mode": {key: [_live_row(e) for e in list(data["by_mode"].get(label, []))[:RANKING_LIMIT]]
+                 for label, key in _MODE_KEYS.items()},
+        "players": [[n, sc] for n, sc in data["best_by_player"].top(RANKING_LIMIT)],
+    }
 
-app = Flask(__name__)
-app.secret_key = os.environ.get("SECRET_KEY", "dev-secret-key-change-me")
+
+def _delta(old: List, new: List) -> List:
+    # [[posição, item], ...] só do que mudou; null = posição deixou de existir
+    out = [[i, item] for i, item in enumerate(new) if i >= len(old) or old[i] != item]
+    out.extend([i, None] for i in range(len(new), len(old)))
+    return out
+
+
+def _sse(event: str, payload: Dict) -> bytes:
+    body = app.json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+    return f"id: {payload['v']}\nevent: {event}\ndata: {body}\n\n".encode("utf-8")
+
+
+def publish_live(data: Dict, mode_keys) -> None:
+    # com _write_lock, logo antes de _version subir: manda aos inscritos as
+    # posições que mudaram desde o último estado publicado
+    global _live
+    if _live is None or not len(broadcaster):
+        _live = None  # sem inscritos não há o que comparar; recomeça na próxima conexão
+        return
+    new = live_state(data)
+    changes: Dict = {}
+    for view in ("overall", "players"):
+        d = _delta(_live[view], new[view])
+        if d:
+            changes[view] = d
+    modes = {}
+    for key in mode_keys:
+        d = _delta(_live["mode"][key], new["mode"][key])
+        if d:
+            modes[key] = d
+    if modes:
+        changes["mode"] = modes
+    _live = new
+    if changes:
+        # a versão sobe logo depois; o id do evento é a nova
+        changes["v"] = _version + 1
+        broadcaster.publish(_sse("delta", changes))
+
+
+def on_ranking_entry(data: Dict, entry: Dict) -> None:
+    # chamado por main.add_ranking_entry (com _write_lock nas rotas do app)
+    key = _MODE_KEYS.get(entry["mode"])
+    publish_live(data, () if key is None else (key,))
+
+
+main.add_ranking_listener(on_ranking_entry)
+
+
+@app.get("/api/rankings/stream")
+def api_rankings_stream():
+    global _live
+    data = ranking_data()
+    # inscreve e tira a foto sob o mesmo lock das gravações: nenhum delta
+    # fica entre a foto e o primeiro evento
+    with _write_lock:
+        # foto antes de inscrever: se ela falhar, não sobra inscrito órfão
+        if _live is None:
+            _live = live_state(data)
+        first = _sse("snapshot", dict(_live, v=_version))
+        q = broadcaster.subscribe()
+    if q is None:
+        resp = jsonify({"error": "muitas conexões, use /api/rankings"})
+        resp.headers["Retry-After"] = "30"
+        return resp, 503
+
+    def stream():
+        try:
+            yield b"retry: 5000\n" + first
+            last = time.monotonic()
+            while True:
+                try:
+                    event = q.get(timeout=STORE_POLL)
+                except queue.Empty:
+                    # partidas de outros workers chegam como delta por aqui
+                    sync_store()
+                    if time.monotonic() - last >= STREAM_KEEPALIVE:
+                        last = time.monotonic()
+                        yield b": ping\n\n"
+                    continue
+                if event is None:
+                    yield b"event: reset\ndata: {}\n\n"
+                    return
+                last = time.monotonic()
+                yield event
+        finally:
+            # cliente fechou (o write falha e o gerador é fechado) ou foi derrubado
+            broadcaster.unsubscribe(q)
+
+    resp = Response(stream(), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-store"
+    resp.headers["X-Accel-Buffering"] = "no"  # proxy não segura os eventos
+    return resp
+
+
+# ----------------------------
+# Página e assets
+# ----------------------------
+WEB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "web")
+ASSET_TYPES = {".css": "text/css; charset=utf-8", ".js": "text/javascript; charset=utf-8"}
+
+
+class Asset:
+    # corpo já comprimido (gzip e, se tiver o módulo, brotli) uma vez só,
+    # na subida do app; cada pedido só escolhe a variante
+    def __init__(self, body: bytes, mimetype: str):
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(body).hexdigest()[:16]
+        self.variants: Dict[str, bytes] = {"identity": body}
+        gz = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(gz) < len(body):
+            self.variants["gzip"] = gz
+        if brotli is not None:
+            br = brotli.compress(body, quality=11)
+            if len(br) < len(body):
+                self.variants["br"] = br
+
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    # "br;q=1.0, gzip;q=0.8, *;q=0.1" -> {"br": 1.0, "gzip": 0.8, "*": 0.1}
+    out = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            out[name.strip().lower()] = q
+    return out
+
+
+def send_asset(asset: Asset, cache_control: str) -> Response:
+    accepted = _accepted_encodings(request.headers.get("Accept-Encoding", ""))
+    encoding = "identity"
+    for enc in ("br", "gzip"):
+        if enc in asset.variants and accepted.get(enc, accepted.get("*", 0)) > 0:
+            encoding = enc
+            break
+    resp = Response(asset.variants[encoding], mimetype=asset.mimetype)
+    if encoding != "identity":
+        resp.headers["Content-Encoding"] = encoding
+    resp.headers["Vary"] = "Accept-Encoding"
+    resp.headers["Cache-Control"] = cache_control
+    # ETag por variante (bytes diferentes precisam de validadores diferentes)
+    resp.set_etag(asset.etag if encoding == "identity" else f"{asset.etag}-{encoding}")
+    return resp.make_conditional(request)
+
+
+def build_assets(web_dir: str = WEB_DIR) -> Tuple[Asset, Dict[str, Asset]]:
+    # game.css -> game.<hash>.css; o HTML aponta pros nomes com hash, então
+    # os assets nunca mudam de conteúdo e podem ser cacheados pra sempre
+    assets: Dict[str, Asset] = {}
+    urls = {}
+    for fname in sorted(os.listdir(web_dir)):
+        stem, ext = os.path.splitext(fname)
+        if ext not in ASSET_TYPES:
+            continue
+        with open(os.path.join(web_dir, fname), "rb") as f:
+            asset = Asset(f.read(), ASSET_TYPES[ext])
+        hashed = f"{stem}.{asset.etag[:10]}{ext}"
+        assets[hashed] = asset
+        urls[fname] = f"/assets/{hashed}"
+    with open(os.path.join(web_dir, "index.html"), encoding="utf-8") as f:
+        html = f.read()
+    html = html.replace("{css}", urls["game.css"]).replace("{js}", urls["game.js"])
+    return Asset(html.encode("utf-8"), "text/html; charset=utf-8"), assets
+
+
+INDEX, ASSETS = build_assets()
+_T_ASSETS = time.perf_counter()
+
+
+@app.get("/assets/<name>")
+def asset(name: str):
+    found = ASSETS.get(name)
+    if found is None:
+        return jsonify({"error": "asset não encontrado"}), 404
+    return send_asset(found, "public, max-age=31536000, immutable")
 
 
 @app.get("/")
 def home():
-    return r"""<!doctype html>
-<html lang="pt-BR">
-<head>
-  <meta charset="utf-8" />
-  <meta name="viewport" content="width=device-width,initial-scale=1" />
-  <title>MATE GAME — Web</title>
-  <style>
-    :root{
-      --bg0:#070A12;
-      --bg1:#0B1020;
-      --card:#0f1730;
-      --card2:#0c1430;
-      --line:#22305a;
-      --text:#EAF0FF;
-      --muted:#AEB9E1;
-      --good:#41f3a2;
-      --bad:#ff5e7a;
-      --pri:#2f6cff;
-      --pri2:#5d8dff;
-      --gold:#ffd36b;
-    }
-    *{box-sizing:border-box}
-    body{
-      margin:0;
-      font-family: ui-sans-serif, system-ui, -apple-system, Segoe UI, Roboto, Arial, sans-serif;
-      color:var(--text);
-      background: radial-gradient(1000px 500px at 20% -10%, rgba(47,108,255,.35), transparent 50%),
-                  radial-gradient(1000px 500px at 80% -10%, rgba(65,243,162,.25), transparent 50%),
-                  linear-gradient(180deg, var(--bg0), var(--bg1));
-      min-height:100vh;
-      overflow-x:hidden;
-    }
-    .wrap{max-width:980px;margin:0 auto;padding:20px}
-    .top{
-      display:flex;align-items:center;justify-content:space-between;gap:12px;
-      padding:16px 18px;border:1px solid rgba(34,48,90,.6);
-      background: rgba(15,23,48,.65); backdrop-filter: blur(10px);
-      border-radius:16px;
-      box-shadow: 0 18px 50px rgba(0,0,0,.35);
-    }
-    .brand{display:flex;align-items:center;gap:12px}
-    .logo{
-      width:42px;height:42px;border-radius:14px;
-      background: linear-gradient(135deg, var(--pri), var(--good));
-      box-shadow: 0 12px 30px rgba(47,108,255,.25);
-      display:grid;place-items:center;font-weight:900;color:#07102a;
-    }
-    h1{margin:0;font-size:18px;letter-spacing:.3px}
-    .sub{margin:2px 0 0;color:var(--muted);font-size:12px}
-    .pill{
-      display:inline-flex;align-items:center;gap:8px;
-      border:1px solid rgba(34,48,90,.7);
-      background: rgba(11,16,32,.55);
-      padding:8px 10px;border-radius:999px;color:var(--muted);
-      font-size:12px;
-      white-space:nowrap;
-    }
-    .grid{display:grid;grid-template-columns: 1.05fr .95fr;gap:14px;margin-top:14px}
-    @media (max-width:900px){ .grid{grid-template-columns:1fr} }
-    .card{
-      border:1px solid rgba(34,48,90,.7);
-      background: rgba(15,23,48,.62);
-      backdrop-filter: blur(10px);
-      border-radius:18px;
-      padding:16px;
-      box-shadow: 0 18px 60px rgba(0,0,0,.30);
-      position:relative;
-      overflow:hidden;
-    }
-    .card::before{
-      content:"";
-      position:absolute;inset:-2px;
-      background: radial-gradient(600px 180px at 15% 0%, rgba(47,108,255,.16), transparent 65%),
-                  radial-gradient(600px 180px at 85% 0%, rgba(65,243,162,.12), transparent 65%);
-      pointer-events:none;
-    }
-    .card > *{position:relative}
-    .titleRow{display:flex;align-items:center;justify-content:space-between;gap:10px}
-    .title{font-weight:800;font-size:14px;color:var(--text)}
-    .small{color:var(--muted);font-size:12px}
-    .row{display:flex;gap:10px;margin-top:10px}
-    .row > *{flex:1}
-    label{display:block;color:var(--muted);font-size:12px;margin:10px 0 6px}
-    input, select{
-      width:100%;
-      padding:12px 12px;
-      border-radius:12px;
-      border:1px solid rgba(34,48,90,.85);
-      background: rgba(7,10,18,.55);
-      color:var(--text);
-      outline:none;
-    }
-    input:focus, select:focus{border-color: rgba(93,141,255,.95); box-shadow:0 0 0 3px rgba(47,108,255,.18)}
-    button{
-      width:100%;
-      padding:12px 12px;
-      border-radius:12px;
-      border:1px solid rgba(47,108,255,.95);
-      background: linear-gradient(135deg, var(--pri), var(--pri2));
-      color:white;
-      font-weight:800;
-      cursor:pointer;
-      transition: transform .08s ease, filter .15s ease;
-    }
-    button:active{transform: translateY(1px) scale(.99)}
-    button.secondary{
-      border-color: rgba(34,48,90,.85);
-      background: rgba(7,10,18,.40);
-      color:var(--text);
-      font-weight:700;
-    }
-    .stats{
-      display:flex;flex-wrap:wrap;gap:8px;margin-top:12px
-    }
-    .stat{
-      padding:8px 10px;border-radius:999px;
-      background: rgba(7,10,18,.45);
-      border:1px solid rgba(34,48,90,.75);
-      color:var(--muted);
-      font-size:12px;
-      display:flex;gap:6px;align-items:center;
-    }
-    .stat b{color:var(--text)}
-    .gameArea{
-      display:flex;flex-direction:column;gap:12px;margin-top:12px
-    }
-    .question{
-      text-align:center;
-      font-size:54px;
-      font-weight:900;
-      letter-spacing: 1px;
-      padding:18px 10px;
-      border-radius:16px;
-      background: rgba(7,10,18,.45);
-      border:1px solid rgba(34,48,90,.75);
-      user-select:none;
-    }
-    .meterWrap{
-      height:10px;border-radius:999px;
-      background: rgba(7,10,18,.55);
-      border:1px solid rgba(34,48,90,.75);
-      overflow:hidden;
-    }
-    .meter{
-      height:100%;
-      width:100%;
-      background: linear-gradient(90deg, var(--good), var(--gold), var(--bad));
-      transform-origin:left;
-      transform: scaleX(1);
-      transition: transform .1s linear;
-    }
-    .msg{
-      min-height:22px;
-      font-size:13px;
-      color:var(--muted);
-      text-align:center;
-    }
-    .msg.ok{color:var(--good);font-weight:800}
-    .msg.bad{color:var(--bad);font-weight:800}
-    .kbd{
-      font-family: ui-monospace, SFMono-Regular, Menlo, Consolas, monospace;
-      padding:2px 6px;border-radius:8px;
-      background: rgba(7,10,18,.55);
-      border:1px solid rgba(34,48,90,.75);
-      color:var(--text);
-      font-size:12px;
-    }
-    .rankList{
-      margin-top:12px;
-      display:flex;flex-direction:column;gap:8px;
-      max-height:260px;
-      overflow:auto;
-      padding-right:4px;
-    }
-    .rankItem{
-      display:flex;align-items:center;justify-content:space-between;gap:10px;
-      padding:10px 10px;border-radius:14px;
-      background: rgba(7,10,18,.40);
-      border:1px solid rgba(34,48,90,.70);
-      font-size:13px;
-      color:var(--muted);
-    }
-    .rankItem b{color:var(--text)}
-    .badge{
-      font-weight:900;
-      color: #07102a;
-      background: linear-gradient(135deg, var(--gold), #fff0b6);
-      padding:6px 10px;border-radius:999px;
-    }
-    .footerNote{margin-top:14px;color:var(--muted);font-size:12px;text-align:center}
-  </style>
-</head>
-<body>
-  <div class="wrap">
-    <div class="top">
-      <div class="brand">
-        <div class="logo">÷</div>
-        <div>
-          <h1>MATE GAME — Web</h1>
-          <div class="sub">Agora sim com cara de jogo: vidas, fases, tempo, combo e ranking.</div>
-        </div>
-      </div>
-      <div class="pill">
-        Terminal continua em <span class="kbd">main.py</span> (rodar com <span class="kbd">python main.py</span>)
-      </div>
-    </div>
-
-    <div class="grid">
-      <!-- SETUP -->
-      <div class="card">
-        <div class="titleRow">
-          <div class="title">Configuração</div>
-          <div class="small">Dica: aperta <span class="kbd">Enter</span> pra enviar resposta</div>
-        </div>
-
-        <label>Nome do competidor</label>
-        <input id="name" placeholder="Ex: Bruno" maxlength="24"/>
-
-        <div class="row">
-          <div>
-            <label>Modo</label>
-            <select id="mode">
-              <option value="add">Soma</option>
-              <option value="sub">Subtração</option>
-              <option value="mul">Multiplicação</option>
-              <option value="div">Divisão</option>
-              <option value="mix" selected>Misto</option>
-            </select>
-          </div>
-          <div>
-            <label>Dificuldade</label>
-            <select id="diff">
-              <option value="easy" selected>Fácil</option>
-              <option value="medium">Médio</option>
-              <option value="hard">Difícil</option>
-            </select>
-          </div>
-        </div>
-
-        <div class="row">
-          <div>
-            <label>Rodadas</label>
-            <select id="rounds">
-              <option value="10" selected>10</option>
-              <option value="20">20</option>
-              <option value="30">30</option>
-            </select>
-          </div>
-          <div>
-            <label>Tempo por questão</label>
-            <select id="timeLimit">
-              <option value="0">Sem tempo</option>
-              <option value="8" selected>8s</option>
-              <option value="5">5s</option>
-              <option value="3">3s</option>
-            </select>
-          </div>
-        </div>
-
-        <div class="row">
-          <button id="btnPlay">▶️ Jogar</button>
-          <button id="btnResetAll" class="secondary">🧹 Reset geral</button>
-        </div>
-
-        <div class="stats" id="stats">
-          <div class="stat">Jogador: <b id="stName">—</b></div>
-          <div class="stat">Pontos: <b id="stScore">0</b></div>
-          <div class="stat">Streak: <b id="stStreak">0</b></div>
-          <div class="stat">Vidas: <b id="stLives">3</b></div>
-          <div class="stat">Rodada: <b id="stRound">0</b>/<b id="stRounds">0</b></div>
-          <div class="stat">Nível: <b id="stLevel">1</b></div>
-        </div>
-      </div>
-
-      <!-- GAME -->
-      <div class="card">
-        <div class="titleRow">
-          <div class="title">Partida</div>
-          <div class="small" id="stModeDiff">—</div>
-        </div>
-
-        <div class="gameArea">
-          <div class="meterWrap" title="Tempo">
-            <div class="meter" id="meter"></div>
-          </div>
-
-          <div class="question" id="q">—</div>
-
-          <div class="row">
-            <input id="ans" placeholder="Sua resposta…" inputmode="numeric" />
-            <button id="btnSend">Responder</button>
-          </div>
-
-          <div class="msg" id="msg"></div>
-
-          <div class="row">
-            <button id="btnNext" class="secondary">Próxima</button>
-            <button id="btnGiveUp" class="secondary">Desistir</button>
-          </div>
-        </div>
-
-        <div class="footerNote">
-          Ranking salvo no navegador (local). Depois a gente liga num ranking global.
-        </div>
-      </div>
-    </div>
-
-    <!-- RANKING -->
-    <div class="card" style="margin-top:14px;">
-      <div class="titleRow">
-        <div class="title">🏆 Ranking (Top 10)</div>
-        <div class="small">Salvo no seu navegador</div>
-      </div>
-      <div class="rankList" id="rank"></div>
-    </div>
-
-    <div class="footerNote">
-      Se o Render “dormir”, a primeira abertura pode demorar no plano free.
-    </div>
-  </div>
-
-<script>
-  // ---------- util ----------
-  const $ = (id) => document.getElementById(id);
-
-  function beep(type="ok"){
-    try{
-      const ctx = new (window.AudioContext || window.webkitAudioContext)();
-      const o = ctx.createOscillator();
-      const g = ctx.createGain();
-      o.type = "sine";
-      o.frequency.value = type==="ok" ? 660 : 220;
-      g.gain.value = 0.08;
-      o.connect(g); g.connect(ctx.destination);
-      o.start();
-      setTimeout(()=>{ o.stop(); ctx.close(); }, 80);
-    }catch(e){}
-  }
-
-  function setMsg(text, kind=""){
-    const m = $("msg");
-    m.textContent = text || "";
-    m.className = "msg " + kind;
-  }
-
-  function clamp(n, a, b){ return Math.max(a, Math.min(b, n)); }
-
-  // ---------- ranking (local) ----------
-  const RKEY = "mate_game_rank_v1";
-  function loadRank(){
-    try { return JSON.parse(localStorage.getItem(RKEY) || "[]"); } catch { return []; }
-  }
-  function saveRank(list){
-    localStorage.setItem(RKEY, JSON.stringify(list.slice(0, 10)));
-  }
-  function addRank(entry){
-    const list = loadRank();
-    list.push(entry);
-    list.sort((a,b)=>b.score-a.score);
-    saveRank(list);
-    renderRank();
-  }
-  function renderRank(){
-    const list = loadRank();
-    const root = $("rank");
-    root.innerHTML = "";
-    if(list.length===0){
-      root.innerHTML = `<div class="rankItem"><span>Nenhum registro ainda.</span><span class="small">Jogue uma partida 🙂</span></div>`;
-      return;
-    }
-    list.slice(0,10).forEach((e, i)=>{
-      const medal = i===0 ? "🥇" : i===1 ? "🥈" : i===2 ? "🥉" : "🏅";
-      const el = document.createElement("div");
-      el.className = "rankItem";
-      el.innerHTML = `
-        <div style="display:flex;gap:10px;align-items:center;">
-          <span class="badge">${medal} #${i+1}</span>
-          <div>
-            <div><b>${e.name}</b> — ${e.score} pts</div>
-            <div class="small">${e.modeLabel} • ${e.diffLabel} • ${e.rounds}Q</div>
-          </div>
-        </div>
-        <div class="small">lvl ${e.level}</div>
-      `;
-      root.appendChild(el);
-    });
-  }
-
-  // ---------- game ----------
-  const MODES = {
-    add: "Soma",
-    sub: "Subtração",
-    mul: "Multiplicação",
-    div: "Divisão",
-    mix: "Misto",
-  };
-  const DIFFS = {
-    easy:   {label:"Fácil",  max:10},
-    medium: {label:"Médio",  max:30},
-    hard:   {label:"Difícil",max:100},
-  };
-
-  let st = {
-    name:"",
-    mode:"mix",
-    diff:"easy",
-    roundsTotal:10,
-    timeLimit:8,
-    score:0,
-    streak:0,
-    lives:3,
-    round:0,
-    level:1,
-    qText:"—",
-    qAnswer:null,
-    qStart:0,
-    timer:null
-  };
-
-  function computeLevel(score){
-    return 1 + Math.floor(score / 120);
-  }
-
-  function pickOp(){
-    if(st.mode !== "mix") return st.mode;
-    const ops = ["add","sub","mul","div"];
-    return ops[Math.floor(Math.random()*ops.length)];
-  }
-
-  function makeQuestion(){
-    const maxN = DIFFS[st.diff].max;
-    const op = pickOp();
-    let a = 1 + Math.floor(Math.random()*maxN);
-    let b = 1 + Math.floor(Math.random()*maxN);
-
-    if(op==="add"){
-      st.qText = `${a} + ${b}`;
-      st.qAnswer = a + b;
-      return;
-    }
-    if(op==="sub"){
-      const x = Math.max(a,b), y = Math.min(a,b);
-      st.qText = `${x} - ${y}`;
-      st.qAnswer = x - y;
-      return;
-    }
-    if(op==="mul"){
-      const aa = 1 + Math.floor(Math.random()*Math.max(3, Math.floor(maxN/2)));
-      const bb = 1 + Math.floor(Math.random()*Math.max(3, Math.floor(maxN/2)));
-      st.qText = `${aa} × ${bb}`;
-      st.qAnswer = aa * bb;
-      return;
-    }
-    if(op==="div"){
-      const divisor = 1 + Math.floor(Math.random()*Math.max(2, Math.floor(maxN/3)));
-      const q = 1 + Math.floor(Math.random()*Math.max(2, Math.floor(maxN/3)));
-      const dividendo = divisor * q;
-      st.qText = `${dividendo} ÷ ${divisor}`;
-      st.qAnswer = q;
-      return;
-    }
-  }
-
-  function pointsFor(correct, elapsed){
-    if(!correct) return 0;
-    const base = 10;
-    const streakBonus = clamp(st.streak, 0, 10) * 2;
-    let speedBonus = 0;
-    if(st.timeLimit > 0){
-      speedBonus = clamp(Math.floor((st.timeLimit - elapsed) * 2), 0, 12);
-    }else{
-      speedBonus = clamp(6 - Math.floor(elapsed), 0, 6);
-    }
-    return base + streakBonus + speedBonus;
-  }
-
-  function stopTimer(){
-    if(st.timer){ clearInterval(st.timer); st.timer=null; }
-  }
-
-  function startTimer(){
-    stopTimer();
-    const meter = $("meter");
-    meter.style.transform = "scaleX(1)";
-    if(st.timeLimit <= 0) return;
-
-    const started = st.qStart;
-    st.timer = setInterval(()=>{
-      const elapsed = (Date.now() - started) / 1000;
-      const ratio = clamp(1 - (elapsed / st.timeLimit), 0, 1);
-      meter.style.transform = `scaleX(${ratio})`;
-
-      if(elapsed >= st.timeLimit){
-        // time over
-        stopTimer();
-        wrong("⏱️ Tempo esgotado!");
-      }
-    }, 80);
-  }
-
-  function render(){
-    $("stName").textContent = st.name || "—";
-    $("stScore").textContent = st.score;
-    $("stStreak").textContent = st.streak;
-    $("stLives").textContent = st.lives;
-    $("stRound").textContent = st.round;
-    $("stRounds").textContent = st.roundsTotal;
-    $("stLevel").textContent = st.level;
-    $("q").textContent = st.qText || "—";
-    $("stModeDiff").textContent = `${MODES[st.mode]} • ${DIFFS[st.diff].label} • ${st.timeLimit>0 ? st.timeLimit+"s" : "sem tempo"}`;
-  }
-
-  function lockGameUI(locked){
-    $("btnSend").disabled = locked;
-    $("btnNext").disabled = locked;
-    $("ans").disabled = locked;
-  }
-
-  function newRound(){
-    if(st.lives <= 0){
-      endGame("💀 Fim de jogo. Sem vidas.");
-      return;
-    }
-    if(st.round >= st.roundsTotal){
-      endGame("🏁 Partida finalizada!");
-      return;
-    }
-
-    st.round += 1;
-    makeQuestion();
-    st.qStart = Date.now();
-    setMsg("", "");
-    $("ans").value = "";
-    $("ans").focus();
-    lockGameUI(false);
-    render();
-    startTimer();
-  }
-
-  function correct(elapsed){
-    stopTimer();
-    st.streak += 1;
-    const gained = pointsFor(true, elapsed);
-    st.score += gained;
-    st.level = computeLevel(st.score);
-    beep("ok");
-    setMsg(`✅ Correto! +${gained} pts (tempo ${elapsed.toFixed(1)}s)`, "ok");
-    lockGameUI(true);
-  }
-
-  function wrong(reason){
-    stopTimer();
-    st.streak = 0;
-    st.lives -= 1;
-    beep("bad");
-    setMsg(`${reason} ❌ Correto: ${st.qAnswer}`, "bad");
-    lockGameUI(true);
-    render();
-    if(st.lives <= 0){
-      endGame("💀 Fim de jogo. Sem vidas.");
-    }
-  }
-
-  function submit(){
-    if(st.qAnswer === null) return;
-    const raw = $("ans").value.trim();
-    if(!raw){ setMsg("Digite uma resposta.", "bad"); return; }
-    const n = Number(raw);
-    if(!Number.isFinite(n)){ setMsg("Resposta inválida.", "bad"); return; }
-
-    const elapsed = (Date.now() - st.qStart)/1000;
-    if(n === st.qAnswer) correct(elapsed);
-    else wrong("Errou!");
-    render();
-  }
-
-  function endGame(msg){
-    stopTimer();
-    lockGameUI(true);
-    setMsg(msg + ` Pontos: ${st.score}`, st.lives>0 ? "ok":"bad");
-    // salva no ranking
-    if((st.name || "").trim().length >= 2){
-      addRank({
-        name: st.name,
-        score: st.score,
-        modeLabel: MODES[st.mode],
-        diffLabel: DIFFS[st.diff].label,
-        rounds: st.roundsTotal,
-        level: st.level,
-        ts: Date.now()
-      });
-    }
-  }
-
-  function startGame(){
-    st.name = $("name").value.trim().slice(0,24);
-    st.mode = $("mode").value;
-    st.diff = $("diff").value;
-    st.roundsTotal = Number($("rounds").value) || 10;
-    st.timeLimit = Number($("timeLimit").value) || 0;
-
-    st.score = 0;
-    st.streak = 0;
-    st.lives = 3;
-    st.round = 0;
-    st.level = 1;
-    st.qText = "—";
-    st.qAnswer = null;
-    st.qStart = 0;
-
-    render();
-    setMsg("Boa! Começou. Responda e aperte Enter 😄", "ok");
-    newRound();
-  }
-
-  function resetAll(){
-    stopTimer();
-    localStorage.removeItem(RKEY);
-    renderRank();
-    setMsg("Reset geral feito (ranking apagado).", "ok");
-  }
-
-  $("btnPlay").addEventListener("click", startGame);
-  $("btnSend").addEventListener("click", submit);
-  $("btnNext").addEventListener("click", newRound);
-  $("btnGiveUp").addEventListener("click", ()=> endGame("🏳️ Você desistiu."));
-  $("btnResetAll").addEventListener("click", resetAll);
-  $("ans").addEventListener("keydown", (e)=>{ if(e.key==="Enter") submit(); });
-
-  renderRank();
-  render();
-  setMsg("Configure e clique em Jogar.", "");
-</script>
-</body>
-</html>
-"""
+    # o HTML muda a cada deploy (aponta pros assets novos): sempre revalida
+    return send_asset(INDEX, "no-cache")
+
+
+# ----------------------------
+# Subida a frio
+# ----------------------------
+# tempos da subida em ms, desde o começo do import deste módulo
+STARTUP = {
+    "imports_ms": round((_T_IMPORTS - _T_START) * 1000, 1),
+    "app_ms": round((_T_APP - _T_IMPORTS) * 1000, 1),
+    "assets_ms": round((_T_ASSETS - _T_APP) * 1000, 1),
+    "import_total_ms": round((_T_ASSETS - _T_START) * 1000, 1),
+}
+_HEALTH_BODY = b"ok\n"
+
+
+@app.get("/healthz")
+def healthz():
+    # aquecimento / health check do Render: não toca no ranking nem no disco
+    if request.args.get("verbose"):
+        return jsonify(STARTUP)
+    return Response(_HEALTH_BODY, mimetype="text/plain", headers={"Cache-Control": "no-store"})
+
+
+def warm_up() -> Dict:
+    # primeira resposta de cada rota principal, ainda no processo pai (com
+    # preload_app do gunicorn os workers nascem com tudo isso pronto)
+    client = app.test_client()
+    t0 = time.perf_counter()
+    client.get("/", headers={"Accept-Encoding": "gzip"})
+    t1 = time.perf_counter()
+    STARTUP["first_response_ms"] = round((t1 - t0) * 1000, 1)
+    if main.STORAGE_BACKEND != "sqlite":
+        # conexão sqlite não pode atravessar o fork; no sqlite cada worker abre a sua
+        client.get("/api/rankings")
+    STARTUP["warmup_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    return STARTUP
+
+
+def startup_line() -> str:
+    return " | ".join(f"{k}: {v}" for k, v in STARTUP.items())
+
+
+if os.environ.get("MATE_STARTUP_REPORT"):
+    print(f"[startup] {startup_line()}", file=sys.stderr)
 
 
 if __name__ == "__main__":
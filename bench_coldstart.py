@@ -0,0 +1,76 @@
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+# alvo documentado no README: do processo nascer até o primeiro byte de "/"
+TTFB_TARGET_MS = 1500
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def server_cmd(port: int):
+    # gunicorn com o gunicorn.conf.py do deploy; sem gunicorn, o servidor do Flask
+    if shutil.which("gunicorn"):
+        return ["gunicorn", "-c", os.path.join(HERE, "gunicorn.conf.py"),
+                "--bind", f"127.0.0.1:{port}", "app:app"]
+    return [sys.executable, "-m", "flask", "--app", "app", "run", "--port", str(port)]
+
+
+def cold_start(port: int) -> dict:
+    # sobe o servidor do zero e mede até o primeiro byte de "/"
+    env = dict(os.environ, PORT=str(port))
+    start = time.perf_counter()
+    proc = subprocess.Popen(server_cmd(port), cwd=HERE, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=0.05):
+                    break
+            except OSError:
+                if proc.poll() is not None:
+                    raise RuntimeError("servidor morreu na subida")
+                time.sleep(0.005)
+        listening = time.perf_counter()
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/") as resp:
+            resp.read(1)
+            first_byte = time.perf_counter()
+            resp.read()
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/healthz?verbose=1") as resp:
+            server = json.loads(resp.read())
+    finally:
+        proc.terminate()
+        proc.wait()
+    return {
+        "listen_ms": (listening - start) * 1000,
+        "ttfb_ms": (first_byte - start) * 1000,
+        "server": server,
+    }
+
+
+if __name__ == "__main__":
+    runs = 3 if "--quick" in sys.argv else 7
+    results = []
+    for i in range(runs):
+        r = cold_start(free_port())
+        results.append(r)
+        srv = r["server"]
+        print(f"#{i + 1}: escutando {r['listen_ms']:6.0f} ms | primeiro byte {r['ttfb_ms']:6.0f} ms"
+              f" | import {srv['import_total_ms']:5.0f} ms"
+              f" | 1ª resposta {srv.get('first_response_ms', '-')} ms")
+    ttfb = statistics.median(r["ttfb_ms"] for r in results)
+    ok = ttfb <= TTFB_TARGET_MS
+    print(f"mediana do primeiro byte: {ttfb:.0f} ms (alvo {TTFB_TARGET_MS} ms) -> "
+          f"{'ok' if ok else 'ACIMA DO ALVO'}")
+    sys.exit(0 if ok else 1)
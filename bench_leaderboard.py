@@ -0,0 +1,82 @@
+import random
+import sys
+import time
+from typing import Dict, List
+
+from leaderboard import Leaderboard, PlayerBests
+
+
+# ----------------------------
+# Jeito antigo: append + sorted() a cada partida
+# ----------------------------
+def add_sorted(entries: List[Dict], entry: Dict, top_n: int) -> List[Dict]:
+    entries.append(entry)
+    return sorted(entries, key=lambda x: x["score"], reverse=True)[:top_n]
+
+
+def best_sorted(best_map: Dict[str, int], k: int):
+    return sorted(best_map.items(), key=lambda x: x[1], reverse=True)[:k]
+
+
+def make_entries(n: int, players: int, seed: int = 42) -> List[Dict]:
+    rng = random.Random(seed)
+    return [
+        {"name": f"p{rng.randrange(players)}", "score": rng.randint(0, 2000), "ts": i}
+        for i in range(n)
+    ]
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def bench(top_n: int, games: int, players: int) -> None:
+    entries = make_entries(games, players)
+
+    # pré-carrega o ranking cheio (caso realista: histórico já existe)
+    warm = make_entries(top_n, players, seed=7)
+
+    def old_way():
+        lst = sorted(warm, key=lambda x: x["score"], reverse=True)
+        for e in entries:
+            lst = add_sorted(lst, e, top_n)
+
+    def new_way():
+        lb = Leaderboard(top_n, warm)
+        for e in entries:
+            lb.add(e)
+
+    best_map: Dict[str, int] = {}
+    bests = PlayerBests()
+    for e in make_entries(players * 3, players, seed=3):
+        if e["score"] > best_map.get(e["name"], 0):
+            best_map[e["name"]] = e["score"]
+        bests.offer(e["name"], e["score"])
+
+    def old_menu():
+        for _ in range(100):
+            best_sorted(best_map, 20)
+
+    def new_menu():
+        for _ in range(100):
+            bests.top(20)
+
+    t_old = timed(old_way)
+    t_new = timed(new_way)
+    m_old = timed(old_menu)
+    m_new = timed(new_menu)
+    print(
+        f"top_n={top_n:>7} jogos={games:>6} | insert: sorted {t_old * 1e6 / games:9.1f} us"
+        f"  leaderboard {t_new * 1e6 / games:6.2f} us  ({t_old / t_new:7.1f}x)"
+        f" | melhor/jogador ({players} jog.): sorted {m_old * 1e4:8.1f} us"
+        f"  índice {m_new * 1e4:5.2f} us"
+    )
+
+
+if __name__ == "__main__":
+    quick = "--quick" in sys.argv
+    for top_n in (20, 1_000, 100_000):
+        games = 200 if top_n >= 100_000 and quick else 2_000
+        bench(top_n, games, players=50_000 if not quick else 5_000)
@@ -0,0 +1,148 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import main
+import replay
+
+# resultado de uma rodada
+CORRECT = "correct"
+WRONG = "wrong"
+INVALID = "invalid"   # resposta não numérica
+TIMEOUT = "timeout"
+
+
+@dataclass
+class RoundResult:
+    kind: str
+    answer: Optional[int]   # o que o jogador respondeu (None se não for número)
+    expected: int
+    gained: int
+    elapsed_ms: int
+
+
+# ----------------------------
+# Motor da partida (sem I/O)
+# ----------------------------
+class GameEngine:
+    # Máquina de estados de uma partida: questão -> resposta -> questão ...
+    # Não lê teclado nem imprime nada; o jogo de terminal, o app web e os
+    # bots do simulate.py só trocam a camada de fora.
+    # O sampler pode ser qualquer objeto com next()/feedback()/last_code
+    # (QuestionSampler, AdaptiveSampler); o recorder do replay é opcional.
+    # grace_ms: folga antes de contar tempo esgotado (ida e volta da rede
+    # quando quem mede é o servidor); os pontos usam o tempo medido.
+
+    def __init__(self, mode_key: str, max_number: int, time_limit: Optional[int],
+                 rounds: int, seed: Optional[int] = None, sampler=None,
+                 recorder: Optional[replay.ReplayRecorder] = None, grace_ms: int = 0):
+        self.mode_key = mode_key
+        self.max_number = max_number
+        self.time_limit = time_limit
+        self.rounds = rounds
+        self.seed = seed if seed is not None else replay.new_seed()
+        self.sampler = sampler or main.QuestionSampler(
+            mode_key, max_number, replay.question_rng(self.seed))
+        self.recorder = recorder
+        self.grace_ms = grace_ms
+
+        self.played = 0
+        self.score = 0
+        self.streak = 0
+        self.correct_count = 0
+        self.finished = False
+        self._current: Optional[Tuple[str, int]] = None
+
+    @property
+    def level(self) -> int:
+        return main.level_from_score(self.score)
+
+    def next_question(self) -> Optional[Tuple[str, int]]:
+        # (texto, resposta) da próxima rodada; None quando a partida acabou
+        if self.finished or self.played >= self.rounds:
+            self.finished = True
+            return None
+        if self._current is None:
+            self._current = self.sampler.next()
+        return self._current
+
+    def resume(self, played: int, score: int, streak: int, correct_count: int,
+               question: Tuple[str, int]) -> None:
+        # continua uma partida cujo estado ficou fora daqui (token do app web)
+        self.played = played
+        self.score = score
+        self.streak = streak
+        self.correct_count = correct_count
+        self.finished = played >= self.rounds
+        self._current = None if self.finished else question
+
+    def answer(self, raw: Optional[str], elapsed_ms: int) -> RoundResult:
+        # raw None = o tempo acabou sem resposta
+        if self._current is None:
+            raise RuntimeError("answer() sem questão pendente")
+        _, expected = self._current
+        self._current = None
+        self.played += 1
+
+        try:
+            user_ans: Optional[int] = int(raw.strip()) if raw is not None else None
+        except ValueError:
+            user_ans = None
+
+        timed_out = (self.time_limit is not None
+                     and elapsed_ms > self.time_limit * 1000 + self.grace_ms)
+        if timed_out:
+            kind = TIMEOUT
+        elif user_ans is None:
+            kind = INVALID
+        elif user_ans == expected:
+            kind = CORRECT
+        else:
+            kind = WRONG
+
+        gained = 0
+        if kind == CORRECT:
+            self.streak += 1
+            self.correct_count += 1
+            gained = main.calc_points(True, self.streak, self.time_limit, elapsed_ms / 1000)
+            self.score += gained
+        else:
+            self.streak = 0
+
+        self.sampler.feedback(kind == CORRECT, elapsed_ms)
+        if self.recorder is not None:
+            self.recorder.add(user_ans, kind == CORRECT, elapsed_ms,
+                              self.sampler.last_code, timeout=timed_out)
+        if self.played >= self.rounds:
+            self.finished = True
+        return RoundResult(kind, user_ans, expected, gained, elapsed_ms)
+
+    def quit(self) -> None:
+        self.finished = True
+        self._current = None
+
+    def summary(self) -> Dict:
+        return {
+            "score": self.score,
+            "correct": self.correct_count,
+            "played": self.played,
+            "rounds": self.rounds,
+            "level": self.level,
+            "seed": self.seed,
+        }
+
+
+def play_answers(mode_key: str, max_number: int, time_limit: Optional[int], rounds: int,
+                 seed: int, answers: List[Tuple[Optional[int], int]], name: str = "",
+                 save_ts: Optional[int] = None) -> Dict:
+    # Joga uma partida já terminada a partir de (resposta, ms) de cada questão,
+    # com as mesmas regras do jogo de terminal. Com save_ts grava o replay.
+    # Função de módulo: roda nos processos do pool do app web.
+    rec = replay.ReplayRecorder(seed, mode_key, max_number, time_limit, rounds, name)
+    game = GameEngine(mode_key, max_number, time_limit, rounds, seed=seed, recorder=rec)
+    for answer, elapsed_ms in answers:
+        if game.next_question() is None:
+            break
+        game.answer(None if answer is None else str(answer), elapsed_ms)
+    if save_ts is not None:
+        rec.save(save_ts)
+    return game.summary()
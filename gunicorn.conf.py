@@ -0,0 +1,27 @@
+import os
+
+# Render passa a porta em $PORT
+bind = f"0.0.0.0:{os.environ.get('PORT', '10000')}"
+
+# O app é importado uma vez no processo pai e os workers nascem por fork já
+# com imports, assets comprimidos e primeira resposta prontos (ver warm_up).
+preload_app = True
+
+# Um worker com threads. Com mais (WEB_CONCURRENCY), cada worker tem sua cópia
+# do ranking em memória e recarrega quando a versão do store muda (ver
+# sync_store no app.py): as outras abas veem a partida em até ~2 s.
+workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+worker_class = "gthread"
+# cada /api/rankings/stream aberto prende uma thread: 8 para as requisições
+# normais + o limite de streams do app (acima dele o app responde 503 e a
+# página volta a consultar /api/rankings)
+threads = int(os.environ.get("GUNICORN_THREADS",
+                             str(8 + int(os.environ.get("MATE_MAX_STREAMS", "200")))))
+timeout = 30
+
+
+def when_ready(server):
+    import app
+
+    app.warm_up()
+    server.log.info("startup: %s", app.startup_line())
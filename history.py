@@ -0,0 +1,200 @@
+import mmap
+import os
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # numpy é opcional; sem ele os filtros rodam em Python puro
+    np = None
+
+HISTORY_DIR = "history"
+
+# coluna -> código do módulo array (tamanho fixo por linha)
+COLUMNS = {
+    "name": "I",        # id na tabela de strings
+    "mode_key": "I",    # id na tabela de strings
+    "difficulty": "I",  # id na tabela de strings
+    "score": "i",
+    "correct": "H",
+    "rounds": "H",
+    "ts": "q",
+}
+STRING_COLUMNS = ("name", "mode_key", "difficulty")
+STRINGS_FILE = "strings.txt"
+
+
+# ----------------------------
+# Histórico completo de partidas (colunar)
+# ----------------------------
+class GameHistory:
+    # Cada coluna é um arquivo binário de largura fixa (um valor por partida),
+    # lido via mmap: filtrar milhões de partidas não cria um dict por linha.
+    # Strings (jogador, modo, dificuldade) ficam internadas numa tabela à parte
+    # e as colunas guardam só o id.
+    # As partidas são gravadas em ordem de ts, então intervalo de tempo é
+    # busca binária na coluna ts.
+
+    def __init__(self, path: str = HISTORY_DIR):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._strings: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._load_strings()
+        self._repair()
+        self._writers = {c: open(self._col_path(c), "ab") for c in COLUMNS}
+        self._strings_writer = open(os.path.join(path, STRINGS_FILE), "a", encoding="utf-8")
+        self._maps: Dict[str, Optional[mmap.mmap]] = {}
+        self._views: Dict[str, memoryview] = {}
+        self._mapped_rows = -1
+        self._rows = self._count_rows()
+
+    def _col_path(self, col: str) -> str:
+        return os.path.join(self.path, col + ".col")
+
+    def _load_strings(self) -> None:
+        fname = os.path.join(self.path, STRINGS_FILE)
+        if not os.path.exists(fname):
+            return
+        good_end = 0
+        with open(fname, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                good_end += len(line)
+                s = line[:-1].decode("utf-8")
+                self._ids[s] = len(self._strings)
+                self._strings.append(s)
+        if good_end < os.path.getsize(fname):
+            with open(fname, "r+b") as f:
+                f.truncate(good_end)
+
+    def _count_rows(self) -> int:
+        sizes = []
+        for col, code in COLUMNS.items():
+            fname = self._col_path(col)
+            size = os.path.getsize(fname) if os.path.exists(fname) else 0
+            sizes.append(size // array(code).itemsize)
+        return min(sizes)
+
+    def _repair(self) -> None:
+        # se a gravação parou no meio de uma linha, corta todas as colunas
+        # no último registro completo
+        rows = self._count_rows()
+        for col, code in COLUMNS.items():
+            fname = self._col_path(col)
+            if not os.path.exists(fname):
+                continue
+            size = rows * array(code).itemsize
+            if os.path.getsize(fname) != size:
+                with open(fname, "r+b") as f:
+                    f.truncate(size)
+
+    def _intern(self, s: str) -> int:
+        sid = self._ids.get(s)
+        if sid is None:
+            # nome com quebra de linha quebraria a tabela
+            s = s.replace("\n", " ")
+            sid = self._ids.get(s)
+            if sid is not None:
+                return sid
+            sid = len(self._strings)
+            self._strings.append(s)
+            self._ids[s] = sid
+            self._strings_writer.write(s + "\n")
+            self._strings_writer.flush()
+        return sid
+
+    # ---------- escrita ----------
+    def append(self, result: Dict) -> None:
+        row = {
+            "name": self._intern(result["name"]),
+            "mode_key": self._intern(result["mode_key"]),
+            "difficulty": self._intern(result["difficulty"]),
+            "score": result["score"],
+            "correct": result.get("correct", 0),
+            "rounds": result.get("rounds", 0),
+            "ts": result["ts"],
+        }
+        for col, code in COLUMNS.items():
+            self._writers[col].write(array(code, [row[col]]).tobytes())
+        for w in self._writers.values():
+            w.flush()
+        self._rows += 1
+
+    # ---------- leitura ----------
+    def __len__(self) -> int:
+        return self._rows
+
+    def _remap(self) -> None:
+        if self._mapped_rows == self._rows:
+            return
+        # os mapas antigos podem ainda estar em uso (arrays do numpy devolvidos
+        # por column()); só soltamos a referência e o GC fecha depois
+        self._maps, self._views = {}, {}
+        for col, code in COLUMNS.items():
+            size = self._rows * array(code).itemsize
+            if size == 0:
+                self._maps[col] = None
+                self._views[col] = memoryview(array(code))
+                continue
+            with open(self._col_path(col), "rb") as f:
+                m = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+            self._maps[col] = m
+            self._views[col] = memoryview(m).cast(code)
+        self._mapped_rows = self._rows
+
+    def column(self, col: str) -> Sequence:
+        # visão somente-leitura da coluna inteira (zero cópia)
+        self._remap()
+        if np is not None:
+            return np.frombuffer(self._views[col], dtype=self._views[col].format)
+        return self._views[col]
+
+    def string(self, sid: int) -> str:
+        return self._strings[sid]
+
+    def row(self, i: int) -> Dict:
+        self._remap()
+        out = {col: self._views[col][i] for col in COLUMNS}
+        for col in STRING_COLUMNS:
+            out[col] = self._strings[out[col]]
+        return out
+
+    def query(
+        self,
+        player: Optional[str] = None,
+        mode_key: Optional[str] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+    ) -> Sequence[int]:
+        # devolve os índices das partidas que batem com os filtros
+        self._remap()
+        ts = self._views["ts"]
+        lo = bisect_left(ts, since) if since is not None else 0
+        hi = bisect_left(ts, until) if until is not None else self._rows
+
+        wanted = {}
+        for col, value in (("name", player), ("mode_key", mode_key)):
+            if value is None:
+                continue
+            sid = self._ids.get(value)
+            if sid is None:
+                return []
+            wanted[col] = sid
+
+        if np is not None:
+            mask = np.ones(hi - lo, dtype=bool)
+            for col, sid in wanted.items():
+                mask &= self.column(col)[lo:hi] == sid
+            return np.nonzero(mask)[0] + lo
+
+        cols = [(self._views[col], sid) for col, sid in wanted.items()]
+        return array("I", (i for i in range(lo, hi) if all(v[i] == sid for v, sid in cols)))
+
+    def close(self) -> None:
+        self._maps, self._views = {}, {}
+        for w in self._writers.values():
+            w.close()
+        self._strings_writer.close()
@@ -0,0 +1,288 @@
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from datetime import date
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# ----------------------------
+# Top-N de partidas
+# ----------------------------
+class Leaderboard:
+    # Lista ordenada e limitada (top-N) de entradas {name, score, ..., ts}.
+    # Ordem: maior score primeiro; empate -> quem fez antes (ts menor) fica na frente.
+    # Inserção: busca binária O(log n); leitura do top-k: O(k), sem re-sort.
+    # Se comporta como lista (len, iteração, índice), então a UI e o json.dump
+    # continuam funcionando igual.
+
+    def __init__(self, capacity: int = 20, entries: Iterable[Dict] = ()):
+        self.capacity = capacity
+        self._keys: List[Tuple[int, int, int]] = []
+        self._entries: List[Dict] = []
+        self._seq = 0
+        # carga inicial: um sort só, em vez de n inserções
+        pairs = sorted((self._key(e), e) for e in entries)[:capacity]
+        self._keys = [k for k, _ in pairs]
+        self._entries = [e for _, e in pairs]
+
+    def _key(self, entry: Dict) -> Tuple[int, int, int]:
+        self._seq += 1
+        return (-entry["score"], entry.get("ts", 0), self._seq)
+
+    def add(self, entry: Dict) -> Optional[int]:
+        # devolve a posição (0-based) em que a entrada entrou, ou None se ficou de fora
+        key = self._key(entry)
+        if len(self._keys) >= self.capacity and key >= self._keys[-1]:
+            return None
+        pos = bisect_right(self._keys, key)
+        self._keys.insert(pos, key)
+        self._entries.insert(pos, entry)
+        if len(self._keys) > self.capacity:
+            self._keys.pop()
+            self._entries.pop()
+        return pos
+
+    def set_capacity(self, capacity: int) -> None:
+        self.capacity = capacity
+        del self._keys[capacity:]
+        del self._entries[capacity:]
+
+    def top(self, k: int) -> List[Dict]:
+        return self._entries[:k]
+
+    def to_list(self) -> List[Dict]:
+        return list(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self._entries)
+
+    def __getitem__(self, idx):
+        return self._entries[idx]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Leaderboard):
+            return self._entries == other._entries
+        if isinstance(other, list):
+            return self._entries == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"Leaderboard(capacity={self.capacity}, entries={self._entries!r})"
+
+
+# ----------------------------
+# Rankings por janela de tempo (hoje / semana)
+# ----------------------------
+def day_key(ts: int) -> int:
+    # dia local (ordinal) em que a partida aconteceu
+    t = time.localtime(ts)
+    return date(t.tm_year, t.tm_mon, t.tm_mday).toordinal()
+
+
+def week_key(ts: int) -> int:
+    # segunda-feira da semana local da partida (ordinal)
+    d = day_key(ts)
+    return d - date.fromordinal(d).weekday()
+
+
+class TimeWindowBoard:
+    # Um Leaderboard limitado por balde de tempo (dia ou semana).
+    # Ler "top de hoje" é O(k) no balde atual; baldes velhos são descartados
+    # aos poucos, quando chega um balde novo — nunca relê o histórico.
+
+    def __init__(self, bucket_fn: Callable[[int], int], capacity: int = 20,
+                 keep: int = 2, entries: Iterable[Dict] = ()):
+        self.bucket_fn = bucket_fn
+        self.capacity = capacity
+        self.keep = keep
+        self._buckets: "OrderedDict[int, Leaderboard]" = OrderedDict()
+        for e in entries:
+            self.add(e)
+
+    def add(self, entry: Dict) -> Optional[int]:
+        key = self.bucket_fn(entry.get("ts", 0))
+        board = self._buckets.get(key)
+        if board is None:
+            if self._buckets and key < next(reversed(self._buckets)):
+                # partida mais velha que o balde atual (ex.: replay fora de ordem)
+                if len(self._buckets) >= self.keep:
+                    return None
+            board = Leaderboard(self.capacity)
+            self._buckets[key] = board
+            # mantém os baldes em ordem e joga fora os que passaram da validade
+            for k in sorted(self._buckets):
+                self._buckets.move_to_end(k)
+            while len(self._buckets) > self.keep:
+                self._buckets.popitem(last=False)
+        return board.add(entry)
+
+    def current(self, now: Optional[int] = None) -> Leaderboard:
+        key = self.bucket_fn(int(time.time()) if now is None else now)
+        return self._buckets.get(key) or Leaderboard(self.capacity)
+
+    def top(self, k: int, now: Optional[int] = None) -> List[Dict]:
+        return self.current(now).top(k)
+
+    def set_capacity(self, capacity: int) -> None:
+        self.capacity = capacity
+        for board in self._buckets.values():
+            board.set_capacity(capacity)
+
+    def to_list(self) -> List[Dict]:
+        # todas as entradas dos baldes ainda válidos (formato do snapshot)
+        return [e for board in self._buckets.values() for e in board]
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.to_list())
+
+    def __len__(self) -> int:
+        return sum(len(board) for board in self._buckets.values())
+
+
+# ----------------------------
+# Posição global (árvore de Fenwick por pontuação)
+# ----------------------------
+class ScoreRankIndex:
+    # Conta quantos jogadores têm cada pontuação, numa árvore de Fenwick.
+    # "Quantos estão acima de S" e "posição de quem tem S" saem em O(log n),
+    # sem ordenar ninguém. Cresce (dobrando) quando aparece um score maior.
+
+    def __init__(self, scores: Iterable[int] = (), size: int = 1024):
+        scores = list(scores)
+        while size <= max(scores, default=0):
+            size *= 2
+        self._size = size
+        self._total = 0
+        self._counts = [0] * size
+        for sc in scores:
+            self._counts[sc] += 1
+            self._total += 1
+        # a árvore só é montada na primeira consulta (não pesa no início do jogo)
+        self._tree: Optional[List[int]] = None
+
+    def _build(self) -> None:
+        # Fenwick em O(n) a partir das contagens
+        tree = [0] + self._counts
+        for i in range(1, self._size + 1):
+            j = i + (i & -i)
+            if j <= self._size:
+                tree[j] += tree[i]
+        self._tree = tree
+
+    def _grow(self, score: int) -> None:
+        size = self._size
+        while size <= score:
+            size *= 2
+        self._counts.extend([0] * (size - self._size))
+        self._size = size
+        self._tree = None
+
+    def _update(self, score: int, delta: int) -> None:
+        self._counts[score] += delta
+        if self._tree is None:
+            return
+        i = score + 1
+        while i <= self._size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, score: int) -> int:
+        # quantos têm pontuação <= score
+        if self._tree is None:
+            self._build()
+        i = min(score, self._size - 1) + 1
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def add(self, score: int) -> None:
+        if score >= self._size:
+            self._grow(score)
+        self._update(score, 1)
+        self._total += 1
+
+    def remove(self, score: int) -> None:
+        self._update(score, -1)
+        self._total -= 1
+
+    def count_above(self, score: int) -> int:
+        if score < 0:
+            return self._total
+        return self._total - self._prefix(score)
+
+    def rank_of(self, score: int) -> int:
+        # empate divide a posição (1 + quantos estão estritamente acima)
+        return 1 + self.count_above(score)
+
+    def __len__(self) -> int:
+        return self._total
+
+
+# ----------------------------
+# Melhor pontuação por jogador
+# ----------------------------
+class PlayerBests(dict):
+    # dict name -> melhor score (mesmo formato de sempre no JSON) mais um
+    # índice ordenado dos top-k jogadores, mantido a cada melhora.
+    # Como o melhor de um jogador só sobe, quem sai do top-k só volta
+    # melhorando — então o índice limitado é sempre exato.
+
+    def __init__(self, items: Optional[Dict[str, int]] = None, index_size: int = 100):
+        super().__init__(items or {})
+        self.index_size = index_size
+        self._index: List[Tuple[int, str]] = sorted((-v, k) for k, v in self.items())[:index_size]
+        self._ranks = ScoreRankIndex(self.values())
+
+    def offer(self, name: str, score: int) -> bool:
+        # devolve True se virou o novo melhor do jogador
+        old = self.get(name, 0)
+        if score <= old:
+            return False
+        self[name] = score
+        if old:
+            self._ranks.remove(old)
+        self._ranks.add(score)
+
+        if old:
+            pos = bisect_left(self._index, (-old, name))
+            if pos < len(self._index) and self._index[pos] == (-old, name):
+                del self._index[pos]
+
+        key = (-score, name)
+        if len(self._index) < self.index_size or key < self._index[-1]:
+            insort(self._index, key)
+            if len(self._index) > self.index_size:
+                self._index.pop()
+        return True
+
+    def merge_names(self, renames: Dict[str, str]) -> None:
+        # junta jogadores: cada nome de renames passa a ser o nome de destino
+        # (fica o maior dos dois melhores). Refaz os índices uma vez no fim.
+        for src, dst in renames.items():
+            score = dict.pop(self, src)
+            if score > self.get(dst, 0):
+                self[dst] = score
+        self._index = sorted((-v, k) for k, v in self.items())[:self.index_size]
+        self._ranks = ScoreRankIndex(self.values())
+
+    def rank(self, name: str) -> Optional[int]:
+        # posição global do jogador (1 = melhor), ou None se ainda não pontuou
+        best = self.get(name)
+        if not best:
+            return None
+        return self._ranks.rank_of(best)
+
+    def count_above(self, score: int) -> int:
+        return self._ranks.count_above(score)
+
+    def top(self, k: int) -> List[Tuple[str, int]]:
+        if k > self.index_size:
+            # pedido maior que o índice: aumenta o índice uma vez e segue
+            self.index_size = k
+            self._index = sorted((-v, n) for n, v in self.items())[:k]
+        return [(name, -neg) for neg, name in self._index[:k]]
@@ -1,64 +1,569 @@
+import time
+
+# marca o começo do import (pra --startup-profile)
+_IMPORT_START = time.perf_counter()
+
+import argparse
+import heapq
 import json
+import math
 import os
 import random
-import time
+import sys
+import tempfile
+import threading
+from array import array
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import terminal
+from adaptive import RANGES as ADAPTIVE_RANGES
+from adaptive import AdaptiveStats, decode_question, question_code
+from leaderboard import Leaderboard, PlayerBests, TimeWindowBoard, day_key, week_key
+from players import PlayerRegistry, normalize_name
+
+try:
+    import fcntl
+except ImportError:  # Windows: trava com msvcrt, ver store_lock
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
 
 RANKING_FILE = "rankings.json"
+JOURNAL_FILE = "rankings.journal"
+# cabeçalho pequeno (top geral + melhores por jogador) lido no início do jogo;
+# o snapshot completo só é lido quando alguém abre os rankings
+HEAD_FILE = "rankings.head.json"
+# trava entre processos para journal/snapshot/claims (vários workers do app
+# web, ou o jogo de terminal aberto junto, usando a mesma pasta)
+LOCK_FILE = "rankings.lock"
+
+# "json" (rankings.json + journal) ou "sqlite" (rankings.db, seguro com vários
+# processos gravando ao mesmo tempo)
+STORAGE_BACKEND = os.environ.get("MATE_STORAGE", "json")
+DB_FILE = "rankings.db"
+# partidas do app web já gravadas (uma linha "id expira_em" por partida)
+CLAIMS_FILE = "claimed_games.log"
+
+# a cada N partidas no journal, compacta tudo num snapshot novo
+COMPACT_EVERY = 200
+
+# quantos registros estão no journal desde o último snapshot
+_journal_records = 0
+# geração do snapshot atual: cada compactação soma 1. O journal começa com
+# uma linha {"_journal_gen": G}; ao carregar, um journal de geração menor que
+# a do snapshot já está nele (queda entre gravar o snapshot e trocar o
+# journal) e é pulado. Journal sem essa linha conta como geração 0.
+_journal_gen = 0
+
+# sqlite: uma conexão por thread (ver _db)
+_db_local = threading.local()
+_db_lock = threading.Lock()
+_db_migrated = False
+_history = None
+_registry = None
+# chamados depois de cada partida entrar no ranking (ex.: o stream do app web)
+_ranking_listeners: List[Callable[[Dict, Dict], None]] = []
+_claims: Optional[Dict[str, int]] = None
+_claims_pos = 0          # até onde o CLAIMS_FILE já foi lido
+_lock_depth = threading.local()
 
 
 # ----------------------------
 # Dados e persistência
 # ----------------------------
-def load_data() -> Dict:
+def empty_data() -> Dict:
+    return {
+        "overall": [],            # lista de dicts: {name, score, mode, difficulty, ts}
+        "by_mode": {},            # mode -> lista
+        "best_by_player": {},     # name -> melhor score
+        "daily": [],              # top de hoje (some sozinho quando o dia vira)
+        "weekly": [],             # top da semana
+        "by_cell": {},            # cell_key -> lista (modo × dificuldade × tempo × rodadas)
+    }
+
+
+def as_view(data: Dict, top_n: int = 20) -> Dict:
+    # troca as listas por Leaderboard / PlayerBests (idempotente)
+    if not isinstance(data["overall"], Leaderboard):
+        data["overall"] = Leaderboard(top_n, data["overall"])
+    for mode, entries in data["by_mode"].items():
+        if not isinstance(entries, Leaderboard):
+            data["by_mode"][mode] = Leaderboard(top_n, entries)
+    by_cell = data.setdefault("by_cell", {})
+    for cell, entries in by_cell.items():
+        if not isinstance(entries, Leaderboard):
+            by_cell[cell] = Leaderboard(top_n, entries)
+    if not isinstance(data["best_by_player"], PlayerBests):
+        data["best_by_player"] = PlayerBests(data["best_by_player"])
+    for key, bucket_fn in (("daily", day_key), ("weekly", week_key)):
+        if not isinstance(data.get(key), TimeWindowBoard):
+            data[key] = TimeWindowBoard(bucket_fn, top_n, entries=data.get(key, []))
+    return data
+
+
+def _json_default(obj):
+    if isinstance(obj, (Leaderboard, TimeWindowBoard)):
+        return obj.to_list()
+    raise TypeError(f"{type(obj).__name__} não é serializável")
+
+
+def load_snapshot() -> Dict:
+    global _journal_gen
+    _journal_gen = 0
     if not os.path.exists(RANKING_FILE):
-        return {
-            "overall": [],            # lista de dicts: {name, score, mode, difficulty, ts}
-            "by_mode": {},            # mode -> lista
-            "best_by_player": {}      # name -> melhor score
-        }
+        return as_view(empty_data())
     try:
         with open(RANKING_FILE, "r", encoding="utf-8") as f:
             data = json.load(f)
         data.setdefault("overall", [])
         data.setdefault("by_mode", {})
         data.setdefault("best_by_player", {})
+        _journal_gen = data.pop("journal_gen", 0)
+        return as_view(data)
+    except Exception as e:
+        # Arquivo corrompido: recomeça (melhor que quebrar o jogo), mas guarda
+        # o arquivo ruim de lado; a próxima compactação sobrescreveria ele
+        bad = f"{RANKING_FILE}.corrupt-{now_ts()}"
+        os.replace(RANKING_FILE, bad)
+        print(f"aviso: {RANKING_FILE} ilegível ({e}); movido para {bad}", file=sys.stderr)
+        return as_view(empty_data())
+
+
+@contextmanager
+def store_lock():
+    # Trava exclusiva (fcntl/msvcrt) no LOCK_FILE enquanto lê ou grava o
+    # journal, o snapshot ou os claims. Reentrante na mesma thread: a
+    # compactação relê o journal com a trava já pega.
+    depth = getattr(_lock_depth, "n", 0)
+    _lock_depth.n = depth + 1
+    try:
+        if depth:
+            yield
+            return
+        with open(LOCK_FILE, "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            elif msvcrt is not None:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                elif msvcrt is not None:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        _lock_depth.n = depth
+
+
+def read_journal(gen: int = 0) -> List[Dict]:
+    # um registro JSON compacto por linha; uma linha cortada no meio
+    # (queda de energia durante a escrita) só perde aquela partida.
+    # Devolve nada se o journal é de uma geração anterior a `gen` (ver
+    # _journal_gen). Com a trava: outro processo pode estar escrevendo a
+    # última linha, e ela não pode ser cortada como se estivesse rasgada.
+    with store_lock():
+        if not os.path.exists(JOURNAL_FILE):
+            return []
+        entries = []
+        good_end = 0
+        file_gen = 0
+        with open(JOURNAL_FILE, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                good_end += len(line)
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if "_journal_gen" in entry:
+                    file_gen = entry["_journal_gen"]
+                    continue
+                # journals da versão anterior levam "_gen" em cada linha
+                if entry.pop("_gen", file_gen) >= gen:
+                    entries.append(entry)
+        # corta o pedaço rasgado pra próxima partida não grudar nele
+        if good_end < os.path.getsize(JOURNAL_FILE):
+            with open(JOURNAL_FILE, "r+b") as f:
+                f.truncate(good_end)
+        return entries
+
+
+def _db():
+    # Uma conexão por thread: as threads do gunicorn dividindo uma só
+    # misturavam os BEGIN/COMMIT ("cannot start a transaction within a
+    # transaction"). A primeira do processo importa o rankings.json.
+    global _db_migrated
+    conn = getattr(_db_local, "conn", None)
+    if conn is None:
+        import ranking_db
+        # schema (ALTER TABLE) e migração uma thread por vez
+        with _db_lock:
+            conn = ranking_db.connect(DB_FILE)
+            if not _db_migrated:
+                if os.path.exists(RANKING_FILE) or os.path.exists(JOURNAL_FILE):
+                    ranking_db.migrate(conn, _load_json_data(), cell_key)
+                _db_migrated = True
+        _db_local.conn = conn
+    return conn
+
+
+def load_data(lazy: bool = False) -> Dict:
+    if STORAGE_BACKEND == "sqlite":
+        import ranking_db
+        data = as_view(ranking_db.load_view(_db()))
+        merge_name_variants(data["best_by_player"])
         return data
-    except Exception:
-        # Se o arquivo corromper, recomeça (melhor que quebrar o jogo)
-        return {
-            "overall": [],
-            "by_mode": {},
-            "best_by_player": {}
-        }
+    if lazy:
+        data = _load_head()
+        if data is not None:
+            return data
+    return _load_json_data()
+
+
+def merge_name_variants(bests: PlayerBests) -> None:
+    # Rankings de antes do cadastro têm "Bruno", "bruno " e "BRUNO" como
+    # jogadores separados. Junta todos no nome de exibição da variante com
+    # maior pontuação (a mesma que o PlayerRegistry escolhe).
+    winner: Dict[str, str] = {}
+    for name, score in bests.items():
+        key = normalize_name(name)
+        cur = winner.get(key)
+        if cur is None or score > bests[cur]:
+            winner[key] = name
+    renames = {}
+    for name in bests:
+        target = " ".join(winner[normalize_name(name)].split())
+        if name != target:
+            renames[name] = target
+    if renames:
+        bests.merge_names(renames)
+
+
+class LazyData(dict):
+    # Começa só com o cabeçalho (overall + best_by_player). Na primeira vez que
+    # alguém pede outra seção (by_mode, daily, ...), carrega o snapshot inteiro
+    # + journal e passa a se comportar como o dict normal.
+
+    def __init__(self, head: Dict):
+        super().__init__(head)
+        self.loaded = False
+        # no app web várias threads podem pedir a carga ao mesmo tempo
+        self._load_lock = threading.Lock()
+
+    def load_full(self) -> None:
+        if self.loaded:
+            return
+        with self._load_lock:
+            if not self.loaded:
+                self.update(_load_json_data())
+                self.loaded = True
+
+    def __missing__(self, key):
+        self.load_full()
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        if key not in self:
+            self.load_full()
+        return dict.get(self, key, default)
+
+
+def _snapshot_stamp() -> List[int]:
+    st = os.stat(RANKING_FILE)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _write_head(data: Dict) -> None:
+    head = {
+        "snapshot": _snapshot_stamp(),
+        "journal_gen": _journal_gen,
+        "overall": data["overall"],
+        "best_by_player": data["best_by_player"],
+    }
+    write_snapshot(head, HEAD_FILE)
+
+
+def _load_head() -> Optional[Dict]:
+    # cabeçalho ausente ou de outro snapshot -> None (carrega tudo)
+    global _journal_records, _journal_gen
+    with store_lock():
+        if not os.path.exists(HEAD_FILE) or not os.path.exists(RANKING_FILE):
+            return None
+        try:
+            with open(HEAD_FILE, "r", encoding="utf-8") as f:
+                head = json.load(f)
+            if head.pop("snapshot", None) != _snapshot_stamp():
+                return None
+        except Exception:
+            return None
+        _journal_gen = head.get("journal_gen", 0)
+        # o journal é curto (no máximo COMPACT_EVERY partidas): aplica só no cabeçalho
+        tail = read_journal(_journal_gen)
+    data = LazyData({
+        "overall": Leaderboard(20, head.get("overall", [])),
+        "best_by_player": PlayerBests(head.get("best_by_player", {})),
+    })
+    for entry in tail:
+        data["overall"].add(entry)
+        data["best_by_player"].offer(entry["name"], entry["score"])
+    _journal_records = len(tail)
+    merge_name_variants(data["best_by_player"])
+    return data
+
+
+def _load_json_data() -> Dict:
+    global _journal_records
+    # snapshot e journal lidos juntos: uma compactação de outro processo no
+    # meio trocaria os dois
+    with store_lock():
+        data = load_snapshot()
+        tail = read_journal(_journal_gen)
+    for entry in tail:
+        _add_ranking_entry_mem(data, entry)
+    _journal_records = len(tail)
+    merge_name_variants(data["best_by_player"])
+    return data
+
+
+def write_snapshot(data: Dict, path: str, extra: Optional[Dict] = None) -> None:
+    # escreve num temporário e troca de uma vez (nunca deixa arquivo pela metade)
+    if isinstance(data, LazyData):
+        data.load_full()
+    if extra:
+        data = dict(data, **extra)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, default=_json_default)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
 
 
 def save_data(data: Dict) -> None:
-    with open(RANKING_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # snapshot completo + zera o journal (compactação)
+    global _journal_records, _journal_gen
+    if STORAGE_BACKEND == "sqlite":
+        # cada partida já foi gravada (e commitada) em add_ranking_entry
+        return
+    with store_lock():
+        # Outros processos podem ter gravado (ou compactado) desde que `data`
+        # foi carregado: compacta o que está no disco, que inclui tudo que
+        # este processo gravou, e não a cópia em memória.
+        fresh = _load_json_data()
+        # a partir daqui o snapshot cobre tudo que está no journal: se cair
+        # antes de trocar o journal, ele (geração antiga) é pulado ao carregar
+        write_snapshot(fresh, RANKING_FILE, {"journal_gen": _journal_gen + 1})
+        _journal_gen += 1
+        _write_head(fresh)
+        tmp = JOURNAL_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"_journal_gen": _journal_gen}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, JOURNAL_FILE)
+        _journal_records = 0
+    # quem chamou passa a ver também as partidas dos outros processos
+    data.update(fresh)
+    if isinstance(data, LazyData):
+        data.loaded = True
+
+
+def append_journal(entry: Dict) -> None:
+    global _journal_records
+    line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+    with store_lock():
+        with open(JOURNAL_FILE, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+    _journal_records += 1
+
+
+def _load_claims() -> Dict[str, int]:
+    # carrega e descarta os vencidos (reescreve o arquivo se sobrou lixo)
+    global _claims_pos
+    now = now_ts()
+    claims: Dict[str, int] = {}
+    total = 0
+    if os.path.exists(CLAIMS_FILE):
+        with open(CLAIMS_FILE, "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) != 2 or not line.endswith("\n"):
+                    continue
+                total += 1
+                if int(parts[1]) >= now:
+                    claims[parts[0]] = int(parts[1])
+    if len(claims) < total:
+        tmp = CLAIMS_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(f"{gid} {exp}\n" for gid, exp in claims.items())
+        os.replace(tmp, CLAIMS_FILE)
+    _claims_pos = os.path.getsize(CLAIMS_FILE) if os.path.exists(CLAIMS_FILE) else 0
+    return claims
+
+
+def _read_new_claims() -> None:
+    # claims que outros processos anotaram depois da última leitura
+    global _claims_pos
+    if not os.path.exists(CLAIMS_FILE):
+        return
+    if os.path.getsize(CLAIMS_FILE) < _claims_pos:
+        # outro processo reescreveu o arquivo (limpou os vencidos)
+        _claims.update(_load_claims())
+        return
+    with open(CLAIMS_FILE, "rb") as f:
+        f.seek(_claims_pos)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            _claims_pos += len(line)
+            parts = line.split()
+            if len(parts) == 2:
+                _claims[parts[0].decode("utf-8")] = int(parts[1])
+
+
+def store_version() -> Tuple[int, ...]:
+    # muda sempre que alguém (este processo ou outro) grava uma partida; o app
+    # web compara com a última vista pra saber se a cópia em memória envelheceu
+    if STORAGE_BACKEND == "sqlite":
+        import ranking_db
+        return (ranking_db.last_id(_db()),)
+    stamp: List[int] = []
+    for path in (RANKING_FILE, JOURNAL_FILE):
+        try:
+            st = os.stat(path)
+            stamp += [st.st_size, st.st_mtime_ns]
+        except FileNotFoundError:
+            stamp += [0, 0]
+    return tuple(stamp)
+
+
+def claim_game(game_id: str, expires: int) -> bool:
+    # Uma partida (id único, ex.: o nonce do token do app web) só entra no
+    # ranking uma vez. O id é lembrado até `expires` (segundos), quando o
+    # próprio token deixa de valer.
+    global _claims
+    if STORAGE_BACKEND == "sqlite":
+        import ranking_db
+        return ranking_db.claim(_db(), game_id, expires)
+    with store_lock():
+        if _claims is None:
+            _claims = _load_claims()
+        else:
+            _read_new_claims()
+        if game_id in _claims:
+            return False
+        _claims[game_id] = expires
+        with open(CLAIMS_FILE, "a", encoding="utf-8") as f:
+            f.write(f"{game_id} {expires}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        _read_new_claims()   # pula a própria linha
+        return True
+
+
+def game_history():
+    # histórico completo (toda partida, não só o top); aberto uma vez
+    global _history
+    if _history is None:
+        from history import GameHistory
+        _history = GameHistory()
+    return _history
+
+
+def player_registry(data: Dict) -> PlayerRegistry:
+    # montado uma vez a partir dos melhores por jogador; se já existem
+    # variações do mesmo nome, a de maior pontuação vira o nome oficial
+    global _registry
+    if _registry is None:
+        bests = data["best_by_player"]
+        _registry = PlayerRegistry(sorted(bests, key=lambda n: -bests[n]))
+    return _registry
+
+
+def record_result(data: Dict, entry: Dict, top_n: int = 20) -> None:
+    # salvar uma partida custa O(1): só uma linha no journal.
+    # O snapshot inteiro só é reescrito a cada COMPACT_EVERY partidas.
+    add_ranking_entry(data, entry, top_n=top_n)
+    if STORAGE_BACKEND == "sqlite":
+        return
+    append_journal(entry)
+    if _journal_records >= COMPACT_EVERY:
+        save_data(data)
 
 
 def now_ts() -> int:
     return int(time.time())
 
 
+def add_ranking_listener(fn: Callable[[Dict, Dict], None]) -> None:
+    # fn(data, entry) roda na thread de quem gravou: tem que ser rápido
+    _ranking_listeners.append(fn)
+
+
 def add_ranking_entry(data: Dict, entry: Dict, top_n: int = 20) -> None:
+    if STORAGE_BACKEND == "sqlite":
+        import ranking_db
+        best = ranking_db.add_entry(_db(), data, entry, top_n, cell=cell_key(entry))
+        as_view(data, top_n)
+        data["best_by_player"].offer(entry["name"], best)
+    else:
+        _add_ranking_entry_mem(data, entry, top_n)
+    # a partida já está gravada: um ouvinte com defeito não pode impedir o
+    # resto (journal, compactação)
+    for fn in _ranking_listeners:
+        try:
+            fn(data, entry)
+        except Exception as e:
+            print(f"aviso: ouvinte do ranking falhou: {e!r}", file=sys.stderr)
+
+
+def _board_add(boards: Dict, key: str, entry: Dict, top_n: int) -> None:
+    if key not in boards:
+        boards[key] = Leaderboard(top_n)
+    board = boards[key]
+    if board.capacity != top_n:
+        board.set_capacity(top_n)
+    board.add(entry)
+
+
+def _add_ranking_entry_mem(data: Dict, entry: Dict, top_n: int = 20) -> None:
+    # carga completa antes de mexer em qualquer seção: senão ela troca o
+    # "overall" do cabeçalho (já com esta partida) pelo do disco (sem ela)
+    if isinstance(data, LazyData):
+        data.load_full()
+    if not isinstance(data["overall"], Leaderboard):
+        as_view(data, top_n)
+
     # ranking geral
-    data["overall"].append(entry)
-    data["overall"] = sorted(data["overall"], key=lambda x: x["score"], reverse=True)[:top_n]
+    _board_add(data, "overall", entry, top_n)
 
     # ranking por modo
-    mode = entry["mode"]
-    data["by_mode"].setdefault(mode, [])
-    data["by_mode"][mode].append(entry)
-    data["by_mode"][mode] = sorted(data["by_mode"][mode], key=lambda x: x["score"], reverse=True)[:top_n]
+    _board_add(data["by_mode"], entry["mode"], entry, top_n)
 
     # melhor por jogador
-    name = entry["name"]
-    best = data["best_by_player"].get(name, 0)
-    if entry["score"] > best:
-        data["best_by_player"][name] = entry["score"]
+    data["best_by_player"].offer(entry["name"], entry["score"])
+
+    # célula modo × dificuldade × tempo × rodadas (só a célula da partida)
+    cell = cell_key(entry)
+    if cell is not None:
+        _board_add(data["by_cell"], cell, entry, top_n)
+
+    # hoje / semana
+    for key in ("daily", "weekly"):
+        board = data[key]
+        if board.capacity != top_n:
+            board.set_capacity(top_n)
+        board.add(entry)
 
 
 # ----------------------------
@@ -76,6 +581,7 @@ DIFFICULTIES = {
     "1": ("Fácil", 10),
     "2": ("Médio", 30),
     "3": ("Difícil", 100),
+    "4": ("Adaptativo", 0),   # 0 = faixa escolhida pelo desempenho do jogador
 }
 
 TIME_MODES = {
@@ -84,6 +590,43 @@ TIME_MODES = {
     "3": ("Relâmpago (3s)", 3),
 }
 
+# faixas de quantidade de questões (rodadas vão de 5 a 50)
+ROUND_BUCKETS = {
+    "1": ("5-10", 5, 10),
+    "2": ("11-20", 11, 20),
+    "3": ("21-35", 21, 35),
+    "4": ("36-50", 36, 50),
+}
+
+# rótulo/valor -> tecla do menu, pra montar a chave da célula em O(1)
+_MODE_KEYS = {key: k for k, (_, key) in MODES.items()}
+_DIFF_KEYS = {label: k for k, (label, _) in DIFFICULTIES.items()}
+_TIME_KEYS = {t: k for k, (_, t) in TIME_MODES.items()}
+
+
+def round_bucket(rounds: int) -> Optional[str]:
+    for k, (_, lo, hi) in ROUND_BUCKETS.items():
+        if lo <= rounds <= hi:
+            return k
+    return None
+
+
+def cell_key(entry: Dict) -> Optional[str]:
+    # chave compacta da combinação modo × dificuldade × tempo × rodadas,
+    # feita das teclas de cada menu: "5321" = Misto, Difícil, 3s, 5-10 questões.
+    # Partidas antigas (sem time_limit/rounds) não entram em nenhuma célula.
+    if "rounds" not in entry or "time_limit" not in entry:
+        return None
+    parts = (
+        _MODE_KEYS.get(entry.get("mode_key")),
+        _DIFF_KEYS.get(entry.get("difficulty")),
+        _TIME_KEYS.get(entry["time_limit"]),
+        round_bucket(entry["rounds"]),
+    )
+    if None in parts:
+        return None
+    return "".join(parts)
+
 
 @dataclass
 class GameConfig:
@@ -94,14 +637,16 @@ class GameConfig:
     max_number: int
     time_limit: Optional[int]
     rounds: int
+    seed: Optional[int] = None   # mesma seed -> mesmas questões (replay)
 
 
 # ----------------------------
 # UI simples (terminal)
 # ----------------------------
 def clear() -> None:
-    # limpa no Windows e Unix
-    os.system("cls" if os.name == "nt" else "clear")
+    # começa uma tela nova; o renderer ANSI (terminal.py) redesenha só as
+    # linhas que mudaram, numa escrita só, sem criar processo a cada tela
+    terminal.clear()
 
 
 def pause(msg: str = "Enter para continuar...") -> None:
@@ -132,10 +677,38 @@ def ask_int(prompt: str, min_v: int, max_v: int) -> int:
         print(f"Digite um número entre {min_v} e {max_v}.")
 
 
-def ask_name() -> str:
+def _enable_name_completion(registry: PlayerRegistry) -> None:
+    # Tab completa o nome no terminal (quando tem readline, ex.: Linux/macOS)
+    try:
+        import readline
+    except ImportError:
+        return
+    matches: List[str] = []
+
+    def complete(text: str, state: int) -> Optional[str]:
+        nonlocal matches
+        if state == 0:
+            matches = registry.search(readline.get_line_buffer())
+        return matches[state] if state < len(matches) else None
+
+    readline.set_completer_delims("")
+    readline.set_completer(complete)
+    readline.parse_and_bind("tab: complete")
+
+
+def ask_name(registry: Optional[PlayerRegistry] = None) -> str:
+    if registry is not None:
+        _enable_name_completion(registry)
+        print("Dica: Tab completa o nome; 'br*' lista quem começa com 'br'.")
     while True:
-        name = input("Nome do competidor: ").strip()
+        name = " ".join(input("Nome do competidor: ").split())
+        if registry is not None and name.endswith("*"):
+            found = registry.search(name[:-1])
+            print("  " + ", ".join(found) if found else "  Nenhum jogador com esse começo.")
+            continue
         if len(name) >= 2:
+            if registry is not None:
+                return registry.add(name)
             return name
         print("Digite pelo menos 2 caracteres.")
 
@@ -171,12 +744,251 @@ def make_question(op: str, max_n: int) -> Tuple[str, int]:
     raise ValueError("Operação inválida")
 
 
+# operações em lote: código -> (nome, símbolo)
+OPS = ("add", "sub", "mul", "div")
+OP_SYMBOLS = ("+", "-", "×", "÷")
+
+
+def operand_range(op: str, max_n: int) -> int:
+    # maior valor sorteado pra cada operação (mesmos limites de make_question)
+    if op in ("add", "sub"):
+        return max_n
+    if op == "mul":
+        return max(3, max_n // 2)
+    if op == "div":
+        return max(2, max_n // 3)
+    raise ValueError("Operação inválida")
+
+
+def _numpy():
+    # numpy é opcional (e pesado de importar): só carrega quando precisa
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class QuestionBatch:
+    # Lote de questões em arrays paralelos: op (código em OPS), a, b e answer.
+    # O texto ("7 × 8 = ?") só é formatado quando alguém pede.
+
+    def __init__(self, ops, a, b, answers):
+        self.ops = ops
+        self.a = a
+        self.b = b
+        self.answers = answers
+
+    def __len__(self) -> int:
+        return len(self.answers)
+
+    def text(self, i: int) -> str:
+        return f"{self.a[i]} {OP_SYMBOLS[self.ops[i]]} {self.b[i]} = ?"
+
+    def __getitem__(self, i: int) -> Tuple[str, int]:
+        # mesmo formato de make_question: (texto, resposta)
+        return self.text(i), int(self.answers[i])
+
+    def __iter__(self) -> Iterator[Tuple[str, int]]:
+        for i in range(len(self)):
+            yield self[i]
+
+
+def make_questions(op: str, max_n: int, n: int, seed: Optional[int] = None) -> QuestionBatch:
+    # Gera n questões de uma vez, com as mesmas distribuições de make_question
+    # (e de pick_operation no "mix"). Com numpy é vetorizado; sem ele, usa
+    # random + array.
+    if op != "mix" and op not in OPS:
+        raise ValueError("Operação inválida")
+    highs = [operand_range(o, max_n) for o in OPS]
+
+    np = _numpy()
+    if np is not None:
+        rng = np.random.default_rng(seed)
+        if op == "mix":
+            codes = rng.integers(0, 4, size=n, dtype=np.int8)
+        else:
+            codes = np.full(n, OPS.index(op), dtype=np.int8)
+        hi = np.asarray(highs, dtype=np.int64)[codes] + 1
+        x = rng.integers(1, hi)
+        y = rng.integers(1, hi)
+        is_sub = codes == 1
+        is_div = codes == 3
+        a = np.where(is_sub, np.maximum(x, y), x)
+        b = np.where(is_sub, np.minimum(x, y), y)
+        # divisão exata: mostra (divisor * quociente) ÷ divisor
+        a = np.where(is_div, x * y, a)
+        b = np.where(is_div, x, b)
+        answers = np.select([codes == 0, is_sub, codes == 2], [a + b, a - b, a * b], default=y)
+        return QuestionBatch(codes, a, b, answers)
+
+    rng = random.Random(seed)
+    if op == "mix":
+        codes = array("b", (rng.randrange(4) for _ in range(n)))
+    else:
+        codes = array("b", [OPS.index(op)]) * n
+    a, b, answers = array("q"), array("q"), array("q")
+    for c in codes:
+        hi = highs[c]
+        x = rng.randint(1, hi)
+        y = rng.randint(1, hi)
+        if c == 0:
+            row = (x, y, x + y)
+        elif c == 1:
+            row = (max(x, y), min(x, y), abs(x - y))
+        elif c == 2:
+            row = (x, y, x * y)
+        else:
+            row = (x * y, x, y)
+        a.append(row[0])
+        b.append(row[1])
+        answers.append(row[2])
+    return QuestionBatch(codes, a, b, answers)
+
+
 def pick_operation(mode_key: str) -> str:
     if mode_key != "mix":
         return mode_key
     return random.choice(["add", "sub", "mul", "div"])
 
 
+# ----------------------------
+# Questões sem repetição dentro da partida
+# ----------------------------
+class OperandPermutation:
+    # Percorre os índices 0..size-1 numa ordem embaralhada, sem repetir e sem
+    # guardar nada além de uma chave e um contador: uma rede de Feistel é uma
+    # bijeção em [0, 4^h); o que cair fora de [0, size) é reembaralhado
+    # ("cycle walking"), em média menos de 4 passos.
+    ROUNDS = 4
+
+    def __init__(self, size: int, rng: random.Random):
+        self.size = size
+        half = 1
+        while (1 << (2 * half)) < size:
+            half += 1
+        self._half = half
+        self._mask = (1 << half) - 1
+        self._rng = rng
+        self._reset()
+
+    def _reset(self) -> None:
+        self._keys = [self._rng.getrandbits(32) for _ in range(self.ROUNDS)]
+        self._next = 0
+
+    def _round(self, r: int, k: int) -> int:
+        f = ((r ^ k) * 0x45D9F3B) & 0xFFFFFFFF
+        return (f ^ (f >> 16)) & self._mask
+
+    def _permute(self, x: int) -> int:
+        left, right = x >> self._half, x & self._mask
+        for k in self._keys:
+            left, right = right, left ^ self._round(right, k)
+        return (left << self._half) | right
+
+    def next(self) -> int:
+        if self._next >= self.size:
+            # acabou o espaço: começa outra volta, com nova ordem
+            self._reset()
+        x = self._permute(self._next)
+        while x >= self.size:
+            x = self._permute(x)
+        self._next += 1
+        return x
+
+
+def _pair_from_index(op: str, idx: int, hi: int) -> Tuple[int, int]:
+    if op == "sub":
+        # pares x >= y (numeração triangular): "7 - 3" e "3 - 7" são a mesma conta
+        t = (math.isqrt(8 * idx + 1) - 1) // 2
+        return t + 1, idx - t * (t + 1) // 2 + 1
+    return idx // hi + 1, idx % hi + 1
+
+
+def _space_size(op: str, hi: int) -> int:
+    return hi * (hi + 1) // 2 if op == "sub" else hi * hi
+
+
+def question_from_operands(op: str, x: int, y: int) -> Tuple[str, int]:
+    if op == "add":
+        return f"{x} + {y} = ?", x + y
+    if op == "sub":
+        return f"{x} - {y} = ?", x - y
+    if op == "mul":
+        return f"{x} × {y} = ?", x * y
+    if op == "div":
+        return f"{x * y} ÷ {x} = ?", y
+    raise ValueError("Operação inválida")
+
+
+class QuestionSampler:
+    # Substitui make_question dentro de uma partida: cada operação tem sua
+    # permutação do espaço de operandos, então não repete conta até esgotar
+    # (no Fácil, soma tem 100 contas). O(1) de tempo e memória por questão.
+
+    def __init__(self, mode_key: str, max_n: int, rng: Optional[random.Random] = None):
+        self.mode_key = mode_key
+        self.max_n = max_n
+        self.rng = rng or random.Random()
+        self._perms: Dict[str, OperandPermutation] = {}
+        # última questão sorteada (replay e telemetria)
+        self.last_code = 0
+        self.last_op = ""
+        self.last_operands = (0, 0)
+        self.last_max = max_n
+
+    def next(self, op: Optional[str] = None) -> Tuple[str, int]:
+        if op is None:
+            op = self.mode_key if self.mode_key != "mix" else self.rng.choice(OPS)
+        self.last_code = question_code(op, 0)
+        hi = operand_range(op, self.max_n)
+        perm = self._perms.get(op)
+        if perm is None:
+            perm = self._perms[op] = OperandPermutation(_space_size(op, hi), self.rng)
+        x, y = _pair_from_index(op, perm.next(), hi)
+        self.last_op = op
+        # operandos como aparecem na tela (divisão: x*y ÷ x)
+        self.last_operands = (x * y, x) if op == "div" else (x, y)
+        return question_from_operands(op, x, y)
+
+    def feedback(self, correct: bool, elapsed_ms: int) -> None:
+        pass
+
+
+class AdaptiveSampler:
+    # Dificuldade "Adaptativo": a operação e a faixa de números de cada questão
+    # saem das estatísticas do jogador (AdaptiveStats), em tempo constante.
+    # Cada faixa tem seu QuestionSampler (sem repetição), todos no mesmo rng
+    # de questões, então o replay consegue regerar as contas pela seed.
+
+    def __init__(self, mode_key: str, stats: AdaptiveStats,
+                 question_rng: random.Random, pick_rng: random.Random):
+        self.mode_key = mode_key
+        self.stats = stats
+        self._qrng = question_rng
+        self._pick_rng = pick_rng
+        self._samplers: Dict[int, QuestionSampler] = {}
+        self.last_code = 0
+        self.last_op = ""
+        self.last_operands = (0, 0)
+        self.last_max = 0
+
+    def next(self) -> Tuple[str, int]:
+        op, r = self.stats.pick(self.mode_key, self._pick_rng)
+        self.last_code = question_code(op, r)
+        sampler = self._samplers.get(r)
+        if sampler is None:
+            sampler = self._samplers[r] = QuestionSampler(self.mode_key, ADAPTIVE_RANGES[r], self._qrng)
+        question = sampler.next(op)
+        self.last_op, self.last_operands = op, sampler.last_operands
+        self.last_max = ADAPTIVE_RANGES[r]
+        return question
+
+    def feedback(self, correct: bool, elapsed_ms: int) -> None:
+        op, r = decode_question(self.last_code)
+        self.stats.update(op, r, correct, elapsed_ms)
+
+
 # ----------------------------
 # Pontuação e progressão
 # ----------------------------
@@ -218,56 +1030,77 @@ def play_game(cfg: GameConfig) -> Dict:
     print("-" * 50)
     pause()
 
-    score = 0
-    streak = 0
-    correct_count = 0
+    import engine
+    import replay
+    import telemetry
 
-    for i in range(1, cfg.rounds + 1):
-        clear()
-        lvl = level_from_score(score)
-        header(f"Questão {i}/{cfg.rounds}  |  Nível {lvl}  |  Pontos {score}  |  Streak {streak}")
+    tlog = telemetry.log()
 
-        op = pick_operation(cfg.mode_key)
-        text, answer = make_question(op, cfg.max_number)
+    seed = cfg.seed if cfg.seed is not None else replay.new_seed()
+    if cfg.max_number:
+        sampler = QuestionSampler(cfg.mode_key, cfg.max_number, replay.question_rng(seed))
+    else:
+        stats = AdaptiveStats(cfg.player_name)
+        sampler = AdaptiveSampler(cfg.mode_key, stats, replay.question_rng(seed),
+                                  replay.pick_rng(seed))
+    recorder = replay.ReplayRecorder(seed, cfg.mode_key, cfg.max_number,
+                                     cfg.time_limit, cfg.rounds, cfg.player_name)
+    game = engine.GameEngine(cfg.mode_key, cfg.max_number, cfg.time_limit, cfg.rounds,
+                             seed, sampler, recorder)
 
-        start = time.time()
-        raw = input(f"{text}  (ou 'sair' para encerrar) \n> ").strip().lower()
-        elapsed = time.time() - start
+    while True:
+        question = game.next_question()
+        if question is None:
+            break
+        text, answer = question
+
+        clear()
+        header(f"Questão {game.played + 1}/{cfg.rounds}  |  Nível {game.level}  |  "
+               f"Pontos {game.score}  |  Streak {game.streak}")
 
-        if raw == "sair":
+        prompt = f"{text}  (ou 'sair' para encerrar) \n> "
+        if cfg.time_limit:
+            # relâmpago: relógio na tela e corte exato no limite
+            typed, elapsed_ns = terminal.timed_input(prompt, cfg.time_limit)
+        else:
+            start = time.perf_counter_ns()
+            typed = input(prompt)
+            elapsed_ns = time.perf_counter_ns() - start
+        # o tempo vale em milissegundos (é o que fica gravado no replay)
+        elapsed_ms = elapsed_ns // 1_000_000
+        if typed is None:
+            # estourou: garante que o replay também veja passar do limite
+            elapsed_ms = max(elapsed_ms, cfg.time_limit * 1000 + 1)
+
+        if typed is not None and typed.strip().lower() == "sair":
+            game.quit()
             break
 
-        # tempo estourado?
-        if cfg.time_limit is not None and elapsed > cfg.time_limit:
-            streak = 0
+        res = game.answer(typed, elapsed_ms)
+        a, b = sampler.last_operands
+        tlog.record({
+            "player": cfg.player_name, "op": sampler.last_op, "a": a, "b": b,
+            "max": sampler.last_max, "correct": res.kind == engine.CORRECT,
+            "kind": res.kind, "latency_ns": elapsed_ns,
+        })
+        elapsed = elapsed_ms / 1000
+        if res.kind == engine.TIMEOUT:
             print(f"⏱️ Tempo esgotado! ({elapsed:.1f}s > {cfg.time_limit}s) Resposta era: {answer}")
-            pause()
-            continue
-
-        # valida resposta numérica
-        try:
-            user_ans = int(raw)
-        except ValueError:
-            streak = 0
+        elif res.kind == engine.INVALID:
             print("Resposta inválida (não é número).")
             print(f"A resposta correta era: {answer}")
-            pause()
-            continue
-
-        correct = (user_ans == answer)
-
-        if correct:
-            streak += 1
-            correct_count += 1
-            gained = calc_points(True, streak, cfg.time_limit, elapsed)
-            score += gained
-            print(f"✅ Correto! +{gained} pontos  (tempo: {elapsed:.1f}s)")
+        elif res.kind == engine.CORRECT:
+            print(f"✅ Correto! +{res.gained} pontos  (tempo: {elapsed:.1f}s)")
         else:
-            streak = 0
-            print(f"❌ Errado. Você respondeu {user_ans}. Correto: {answer}  (tempo: {elapsed:.1f}s)")
-
+            print(f"❌ Errado. Você respondeu {res.answer}. Correto: {answer}  (tempo: {elapsed:.1f}s)")
         pause()
 
+    ts = now_ts()
+    recorder.save(ts)
+    if not cfg.max_number:
+        stats.save()
+    score, correct_count = game.score, game.correct_count
+
     # resumo
     clear()
     header("Resumo da Partida")
@@ -277,7 +1110,6 @@ def play_game(cfg: GameConfig) -> Dict:
     print(f"Acertos: {correct_count}/{cfg.rounds}")
     print(f"Nível final: {level_from_score(score)}")
     print("-" * 50)
-    pause()
 
     return {
         "name": cfg.player_name,
@@ -285,7 +1117,11 @@ def play_game(cfg: GameConfig) -> Dict:
         "mode": cfg.mode_label,
         "mode_key": cfg.mode_key,
         "difficulty": cfg.diff_label,
-        "ts": now_ts(),
+        "correct": correct_count,
+        "rounds": cfg.rounds,
+        "time_limit": cfg.time_limit,
+        "seed": seed,
+        "ts": ts,
     }
 
 
@@ -317,8 +1153,11 @@ def show_rankings(data: Dict) -> None:
         print("1) Ranking geral (Top 20)")
         print("2) Ranking por modo")
         print("3) Melhor pontuação por jogador")
+        print("4) Ranking de hoje (Top 20)")
+        print("5) Ranking da semana (Top 20)")
+        print("6) Ranking por configuração (modo, dificuldade, tempo, rodadas)")
         print("0) Voltar")
-        ch = ask_choice("> ", ["1", "2", "3", "0"])
+        ch = ask_choice("> ", ["1", "2", "3", "4", "5", "6", "0"])
 
         if ch == "1":
             print_ranking(data["overall"], "Ranking Geral — Top 20")
@@ -342,15 +1181,42 @@ def show_rankings(data: Dict) -> None:
                 print("Nenhum registro ainda.")
                 pause()
                 continue
-            best_list = sorted(best_map.items(), key=lambda x: x[1], reverse=True)[:20]
+            best_list = best_map.top(20)
             for idx, (name, best) in enumerate(best_list, start=1):
                 print(f"{idx:02d}. {name:<18} | {best:>5} pts")
             print("-" * 50)
             pause()
+        elif ch == "4":
+            print_ranking(data["daily"].top(20), "Ranking de Hoje — Top 20")
+        elif ch == "5":
+            print_ranking(data["weekly"].top(20), "Ranking da Semana — Top 20")
+        elif ch == "6":
+            keys = []
+            for title, options in (("Modo", MODES), ("Dificuldade", DIFFICULTIES),
+                                   ("Tempo", TIME_MODES), ("Rodadas", ROUND_BUCKETS)):
+                clear()
+                header(title)
+                for k, opt in options.items():
+                    print(f"{k}) {opt[0]}")
+                keys.append(ask_choice("> ", list(options.keys())))
+            cell = "".join(keys)
+            title = " • ".join(opts[k][0] for opts, k in
+                               zip((MODES, DIFFICULTIES, TIME_MODES, ROUND_BUCKETS), keys))
+            print_ranking(data["by_cell"].get(cell, []), title)
         else:
             return
 
 
+def position_text(data: Dict, name: str) -> str:
+    # "#1 234 de 50 000" (posição pelo melhor score do jogador), O(log n)
+    bests = data["best_by_player"]
+    pos = bests.rank(name)
+    if pos is None:
+        return ""
+    total = len(bests)
+    return f"#{pos:,} de {total:,}".replace(",", " ")
+
+
 # ----------------------------
 # Configuração da partida
 # ----------------------------
@@ -367,7 +1233,10 @@ def build_config(player_name: str) -> GameConfig:
     clear()
     header("Dificuldade")
     for k, (label, max_n) in DIFFICULTIES.items():
-        print(f"{k}) {label} (números até {max_n})")
+        if max_n:
+            print(f"{k}) {label} (números até {max_n})")
+        else:
+            print(f"{k}) {label} (ajusta ao seu desempenho)")
     diff_choice = ask_choice("> ", list(DIFFICULTIES.keys()))
     diff_label, max_number = DIFFICULTIES[diff_choice]
 
@@ -393,11 +1262,176 @@ def build_config(player_name: str) -> GameConfig:
     )
 
 
+# ----------------------------
+# Importar / exportar rankings (várias máquinas)
+# ----------------------------
+def _merge_key(entry: Dict) -> Tuple[int, int, str]:
+    return (-entry["score"], entry.get("ts", 0), entry["name"])
+
+
+def snapshot_entries(data: Dict) -> List[Dict]:
+    # todas as partidas de um snapshot (cada lista é um top-N), sem repetir,
+    # do maior score pro menor
+    seen = set()
+    out = []
+    sections = [data.get("overall", []), data.get("daily", []), data.get("weekly", [])]
+    sections += list(data.get("by_mode", {}).values())
+    sections += list(data.get("by_cell", {}).values())
+    for entries in sections:
+        for e in entries:
+            k = (e["name"], e.get("ts", 0), e["score"])
+            if k not in seen:
+                seen.add(k)
+                out.append(e)
+    out.sort(key=_merge_key)
+    return out
+
+
+def _spill_ranking_file(path: str, bests: PlayerBests, tmp_dir: str) -> str:
+    # rankings.json: o arquivo é um snapshot limitado (listas top-N), então lê
+    # inteiro, mas um de cada vez: as partidas vão ordenadas pra um NDJSON
+    # temporário e o merge lê esse arquivo linha a linha. Melhores por
+    # jogador vão direto pro mapa combinado.
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    for name, best in data.get("best_by_player", {}).items():
+        bests.offer(name, best)
+    fd, out_path = tempfile.mkstemp(suffix=".ndjson", dir=tmp_dir)
+    with os.fdopen(fd, "w", encoding="utf-8") as out:
+        export_ndjson(data, out)
+    return out_path
+
+
+def _iter_ndjson(path: str) -> Iterator[Dict]:
+    # NDJSON: uma partida por linha, já em ordem de score (como export_ndjson grava);
+    # lido linha a linha, memória constante
+    prev = None
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            key = _merge_key(entry)
+            if prev is not None and key < prev:
+                raise ValueError(f"{path}:{lineno}: arquivo fora de ordem (exporte com 'export')")
+            prev = key
+            yield entry
+
+
+def merge_rankings(paths: List[str], top_n: int = 20) -> Dict:
+    # k-way merge por score de N arquivos, tirando repetidos (name, ts, score),
+    # e reconstruindo todas as seções numa passada só
+    bests = PlayerBests()
+    with tempfile.TemporaryDirectory(prefix="mate-merge-") as tmp_dir:
+        streams = []
+        for path in paths:
+            if not path.endswith((".ndjson", ".jsonl")):
+                path = _spill_ranking_file(path, bests, tmp_dir)
+            streams.append(_iter_ndjson(path))
+        return _merge_streams(streams, bests, top_n)
+
+
+def _merge_streams(streams: List[Iterator[Dict]], bests: PlayerBests, top_n: int) -> Dict:
+    # memória: uma linha por arquivo + as seções top-N do resultado
+    data = as_view(empty_data(), top_n)
+    data["best_by_player"] = bests
+    # repetidos têm o mesmo score, então chegam colados: basta lembrar das
+    # chaves do score atual
+    cur_score = None
+    seen = set()
+    for entry in heapq.merge(*streams, key=_merge_key):
+        if entry["score"] != cur_score:
+            cur_score = entry["score"]
+            seen.clear()
+        k = (entry["name"], entry.get("ts", 0), entry["score"])
+        if k in seen:
+            continue
+        seen.add(k)
+        _add_ranking_entry_mem(data, entry, top_n)
+    return data
+
+
+def export_ndjson(data: Dict, out) -> int:
+    # uma partida por linha, do maior score pro menor (formato que o merge lê)
+    n = 0
+    for e in snapshot_entries(data):
+        out.write(json.dumps(e, ensure_ascii=False, separators=(",", ":")) + "\n")
+        n += 1
+    return n
+
+
+def cli(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="main.py", description="MATE GAME")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="mostra tempo de import e até o primeiro menu")
+    sub = parser.add_subparsers(dest="cmd")
+
+    p_merge = sub.add_parser("merge", help="junta rankings de várias máquinas")
+    p_merge.add_argument("files", nargs="+", help="rankings.json ou .ndjson")
+    p_merge.add_argument("-o", "--out", required=True, help="snapshot de saída (rankings.json)")
+    p_merge.add_argument("--top", type=int, default=20)
+
+    p_export = sub.add_parser("export", help="exporta o ranking local em NDJSON")
+    p_export.add_argument("-o", "--out", default="-", help="arquivo de saída (padrão: stdout)")
+
+    p_replay = sub.add_parser("replay", help="re-pontua e audita gravações de partidas")
+    p_replay.add_argument("files", nargs="+", help="arquivos .mgr (pasta replays/)")
+
+    p_tele = sub.add_parser("telemetry", help="latência por operação (p50/p95/p99)")
+    p_tele.add_argument("file", nargs="?", default=None, help="log NDJSON (padrão: telemetry.ndjson)")
+
+    args = parser.parse_args(argv)
+
+    if args.cmd == "merge":
+        data = merge_rankings(args.files, top_n=args.top)
+        write_snapshot(data, args.out)
+        print(f"{len(args.files)} arquivo(s) -> {args.out} ({len(data['best_by_player'])} jogadores)")
+        return 0
+
+    if args.cmd == "export":
+        data = load_data()
+        if args.out == "-":
+            export_ndjson(data, sys.stdout)
+        else:
+            with open(args.out, "w", encoding="utf-8") as f:
+                n = export_ndjson(data, f)
+            print(f"{n} partida(s) -> {args.out}")
+        return 0
+
+    if args.cmd == "replay":
+        import replay
+        bad_games = 0
+        for path in args.files:
+            rep = replay.load(path)
+            res = replay.rescore(rep)
+            bad = replay.verify(rep)
+            bad_games += bool(bad)
+            status = "ok" if not bad else f"DIVERGE nas rodadas {[i + 1 for i in bad]}"
+            print(f"{path}: {res['name']} | {res['score']} pts | "
+                  f"{res['correct']}/{res['rounds']} | nível {res['level']} | {status}")
+        return 1 if bad_games else 0
+
+    if args.cmd == "telemetry":
+        import telemetry
+        path = args.file or os.environ.get("MATE_TELEMETRY", telemetry.TELEMETRY_FILE)
+        if not os.path.exists(path):
+            print(f"{path}: não encontrado", file=sys.stderr)
+            return 1
+        telemetry.report(path)
+        return 0
+
+    main_menu(startup_profile=args.startup_profile)
+    return 0
+
+
 # ----------------------------
 # Menu principal
 # ----------------------------
-def main_menu() -> None:
-    data = load_data()
+def main_menu(startup_profile: bool = False) -> None:
+    t_load = time.perf_counter()
+    data = load_data(lazy=True)
+    t_loaded = time.perf_counter()
 
     player_name: Optional[str] = None
 
@@ -406,7 +1440,7 @@ def main_menu() -> None:
         header("MATE GAME")
         if player_name:
             best = data.get("best_by_player", {}).get(player_name, 0)
-            print(f"Jogador atual: {player_name}  |  Melhor: {best} pts")
+            print(f"Jogador atual: {player_name}  |  Melhor: {best} pts  {position_text(data, player_name)}")
         else:
             print("Jogador atual: (nenhum)")
         print("-" * 50)
@@ -417,13 +1451,28 @@ def main_menu() -> None:
         print("4) Ajuda rápida")
         print("0) Sair")
 
+        if startup_profile:
+            startup_profile = False
+            t_menu = time.perf_counter()
+            print(
+                f"[startup] import: {(_IMPORT_DONE - _IMPORT_START) * 1000:.1f} ms | "
+                f"load_data: {(t_loaded - t_load) * 1000:.1f} ms | "
+                f"primeiro menu: {(t_menu - _IMPORT_START) * 1000:.1f} ms",
+                file=sys.stderr,
+            )
+
         ch = ask_choice("> ", ["1", "2", "3", "4", "0"])
 
         if ch == "1":
             clear()
             header("Novo competidor")
-            player_name = ask_name()
-            print(f"Ok, {player_name}! ✅")
+            registry = player_registry(data)
+            known = len(registry)
+            player_name = ask_name(registry)
+            if len(registry) == known:
+                print(f"Bem-vindo de volta, {player_name}! ✅")
+            else:
+                print(f"Ok, {player_name}! ✅")
             pause()
 
         elif ch == "2":
@@ -436,6 +1485,7 @@ def main_menu() -> None:
 
             cfg = build_config(player_name)
             result = play_game(cfg)
+            game_history().append(result)
 
             # salva resultado se pontuou
             entry = {
@@ -443,10 +1493,18 @@ def main_menu() -> None:
                 "score": result["score"],
                 "mode": result["mode"],
                 "difficulty": result["difficulty"],
+                "mode_key": result["mode_key"],
+                "time_limit": result["time_limit"],
+                "rounds": result["rounds"],
                 "ts": result["ts"],
             }
-            add_ranking_entry(data, entry, top_n=20)
-            save_data(data)
+            record_result(data, entry, top_n=20)
+
+            # o resumo da partida continua na tela; só acrescenta a posição
+            pos = position_text(data, player_name)
+            if pos:
+                print(f"Posição global: {pos}")
+            pause()
 
         elif ch == "3":
             show_rankings(data)
@@ -457,7 +1515,7 @@ def main_menu() -> None:
             print("• Digite 'sair' durante uma questão para encerrar a partida.")
             print("• 'Relâmpago' dá bônus por rapidez, mas se passar do tempo, perde a questão.")
             print("• Streak (sequência de acertos) aumenta seus pontos.")
-            print("• O ranking fica salvo no arquivo rankings.json na mesma pasta do jogo.")
+            print("• O ranking fica salvo em rankings.json (+ rankings.journal) na mesma pasta do jogo.")
             print("-" * 50)
             pause()
 
@@ -465,8 +1523,13 @@ def main_menu() -> None:
             clear()
             header("Até mais!")
             print("Saindo...")
+            if _journal_records:
+                save_data(data)
             break
 
 
+_IMPORT_DONE = time.perf_counter()
+
+
 if __name__ == "__main__":
-    main_menu()
+    sys.exit(cli(sys.argv[1:]))
@@ -0,0 +1,135 @@
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional
+
+# quantos nomes cada nó da trie guarda prontos pro autocomplete
+SUGGESTIONS_PER_NODE = 10
+
+
+def normalize_name(name: str) -> str:
+    # "  BRUNO   Silva " e "bruno silva" são o mesmo jogador
+    return " ".join(name.split()).casefold()
+
+
+class _Node:
+    __slots__ = ("children", "keys", "count", "end")
+
+    def __init__(self):
+        # children só existe depois que o nó "estoura" (mais de
+        # SUGGESTIONS_PER_NODE nomes abaixo dele); antes disso, keys guarda todos
+        self.children: Optional[Dict[str, "_Node"]] = None
+        # os primeiros nomes normalizados abaixo desse nó, em ordem
+        self.keys: List[str] = []
+        self.count = 0
+        self.end = False  # algum nome termina exatamente aqui (nó estourado)
+
+
+# ----------------------------
+# Cadastro de jogadores
+# ----------------------------
+class PlayerRegistry:
+    # nome normalizado -> nome de exibição (o primeiro que apareceu),
+    # mais uma trie por prefixo. Cada nó guarda as primeiras sugestões já
+    # ordenadas, então autocomplete custa O(len(prefixo)).
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._display: Dict[str, str] = {}
+        self._root = _Node()
+        # carga inicial: dedup primeiro (o primeiro nome vence) e insere na trie
+        # em ordem alfabética, assim os nós enchem logo e o resto é descartado rápido
+        for name in names:
+            key = normalize_name(name)
+            if key not in self._display:
+                self._display[key] = " ".join(name.split())
+        for key in sorted(self._display):
+            self._insert(key)
+
+    def __len__(self) -> int:
+        return len(self._display)
+
+    def __contains__(self, name: str) -> bool:
+        return normalize_name(name) in self._display
+
+    def canonical(self, name: str) -> Optional[str]:
+        return self._display.get(normalize_name(name))
+
+    def add(self, name: str) -> str:
+        # devolve o nome de exibição oficial (o que já existia, se for o caso)
+        key = normalize_name(name)
+        if key in self._display:
+            return self._display[key]
+        display = " ".join(name.split())
+        self._display[key] = display
+        self._insert(key)
+        return display
+
+    def _insert(self, key: str, node: Optional[_Node] = None, depth: int = 0) -> None:
+        node = node or self._root
+        while True:
+            node.count += 1
+            if node.children is None:
+                if node.count > SUGGESTIONS_PER_NODE:
+                    self._burst(node, depth, node.keys + [key])
+                else:
+                    node.keys.insert(bisect_left(node.keys, key), key)
+                return
+            self._offer(node, key)
+            if depth == len(key):
+                node.end = True
+                return
+            node = node.children.setdefault(key[depth], _Node())
+            depth += 1
+
+    def _burst(self, node: _Node, depth: int, pending: List[str]) -> None:
+        # nó cheio vira nó interno: redistribui os nomes pelos filhos e
+        # fica só com as primeiras sugestões
+        node.children = {}
+        node.keys = sorted(pending)[:SUGGESTIONS_PER_NODE]
+        for k in pending:
+            if depth == len(k):
+                node.end = True
+                continue
+            child = node.children.setdefault(k[depth], _Node())
+            self._insert(k, child, depth + 1)
+
+    def _offer(self, node: _Node, key: str) -> None:
+        keys = node.keys
+        if len(keys) >= SUGGESTIONS_PER_NODE and key >= keys[-1]:
+            return
+        keys.insert(bisect_left(keys, key), key)
+        if len(keys) > SUGGESTIONS_PER_NODE:
+            keys.pop()
+
+    def _find(self, prefix: str):
+        # devolve (nó, prefixo normalizado); num nó não estourado os nomes
+        # ainda precisam ser filtrados pelo resto do prefixo
+        node = self._root
+        prefix = normalize_name(prefix)
+        for ch in prefix:
+            if node.children is None:
+                return node, prefix
+            node = node.children.get(ch)
+            if node is None:
+                return None, prefix
+        return node, prefix
+
+    def search(self, prefix: str, limit: int = SUGGESTIONS_PER_NODE) -> List[str]:
+        node, prefix = self._find(prefix)
+        if node is None:
+            return []
+        if node.children is None or limit <= SUGGESTIONS_PER_NODE:
+            found = [k for k in node.keys if k.startswith(prefix)][:limit]
+            if node.children is None or len(found) == limit or len(found) == node.count:
+                return [self._display[k] for k in found]
+        # pedido maior que o cache do nó: percorre a subárvore em ordem
+        out: List[str] = []
+        stack = [(node, prefix)]
+        while stack and len(out) < limit:
+            node, path = stack.pop()
+            if node.children is None:
+                out.extend(self._display[k] for k in node.keys if k.startswith(path))
+                continue
+            if node.end:
+                out.append(self._display[path])
+            for ch in sorted(node.children, reverse=True):
+                stack.append((node.children[ch], path + ch))
+        return out[:limit]
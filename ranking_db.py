@@ -0,0 +1,296 @@
+import sqlite3
+import time
+from datetime import date
+from typing import Callable, Dict, List, Optional
+
+from leaderboard import day_key, week_key
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    mode TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    mode_key TEXT,
+    time_limit INTEGER,
+    rounds INTEGER,
+    cell TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_games_uniq ON games (name, ts, score, mode);
+CREATE INDEX IF NOT EXISTS idx_games_mode_score ON games (mode, score DESC, ts);
+CREATE INDEX IF NOT EXISTS idx_games_name_score ON games (name, score DESC);
+CREATE INDEX IF NOT EXISTS idx_games_score ON games (score DESC, ts);
+CREATE INDEX IF NOT EXISTS idx_games_ts ON games (ts);
+CREATE INDEX IF NOT EXISTS idx_games_cell_score ON games (cell, score DESC, ts);
+
+CREATE TABLE IF NOT EXISTS player_best (
+    name TEXT PRIMARY KEY,
+    best INTEGER NOT NULL
+);
+
+-- partidas do app web já gravadas (id = nonce do token), até o token expirar
+CREATE TABLE IF NOT EXISTS claimed_games (
+    id TEXT PRIMARY KEY,
+    expires INTEGER NOT NULL
+);
+"""
+
+ENTRY_COLS = "name, score, mode, difficulty, ts, mode_key, time_limit, rounds"
+
+# colunas que entraram depois da primeira versão do banco
+ADDED_COLUMNS = {
+    "mode_key": "TEXT",
+    "time_limit": "INTEGER",
+    "rounds": "INTEGER",
+    "cell": "TEXT",
+}
+
+
+# ----------------------------
+# Conexão e schema
+# ----------------------------
+def connect(path: str) -> sqlite3.Connection:
+    # isolation_level=None: cada comando é sua própria transação,
+    # a não ser que a gente abra uma com BEGIN. Uma conexão por thread (o
+    # BEGIN/COMMIT manual não pode ser dividido entre threads)
+    conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    # WAL: leitores não bloqueiam o escritor (vários quiosques / workers do gunicorn)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=10000")
+    _add_missing_columns(conn)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _add_missing_columns(conn: sqlite3.Connection) -> None:
+    # bancos criados antes das colunas novas: ALTER TABLE antes dos índices
+    cols = {r["name"] for r in conn.execute("PRAGMA table_info(games)")}
+    if not cols:
+        return
+    for col, kind in ADDED_COLUMNS.items():
+        if col not in cols:
+            conn.execute(f"ALTER TABLE games ADD COLUMN {col} {kind}")
+
+
+def _row_to_entry(row: sqlite3.Row) -> Dict:
+    entry = {
+        "name": row["name"],
+        "score": row["score"],
+        "mode": row["mode"],
+        "difficulty": row["difficulty"],
+        "ts": row["ts"],
+    }
+    # partidas antigas não têm a configuração completa
+    if row["rounds"] is not None:
+        entry["mode_key"] = row["mode_key"]
+        entry["time_limit"] = row["time_limit"]
+        entry["rounds"] = row["rounds"]
+    return entry
+
+
+def _insert(conn: sqlite3.Connection, entry: Dict, cell: Optional[str] = None) -> None:
+    conn.execute(
+        f"INSERT OR IGNORE INTO games ({ENTRY_COLS}, cell) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (entry["name"], entry["score"], entry["mode"], entry["difficulty"], entry["ts"],
+         entry.get("mode_key"), entry.get("time_limit"), entry.get("rounds"), cell),
+    )
+    if entry["score"] > 0:
+        conn.execute(
+            "INSERT INTO player_best (name, best) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET best = max(best, excluded.best)",
+            (entry["name"], entry["score"]),
+        )
+
+
+# ----------------------------
+# Escrita
+# ----------------------------
+def insert_entry(conn: sqlite3.Connection, entry: Dict, cell: Optional[str] = None) -> None:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _insert(conn, entry, cell)
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def migrate(conn: sqlite3.Connection, data: Dict,
+            cell_fn: Callable[[Dict], Optional[str]] = lambda e: None) -> bool:
+    # importa um rankings.json antigo; só roda se o banco estiver vazio.
+    # BEGIN IMMEDIATE garante que dois processos não migrem ao mesmo tempo.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute("SELECT 1 FROM games LIMIT 1").fetchone() is not None:
+            conn.execute("ROLLBACK")
+            return False
+        for entry in data.get("overall", []):
+            _insert(conn, entry, cell_fn(entry))
+        for key in ("by_mode", "by_cell"):
+            for entries in data.get(key, {}).values():
+                for entry in entries:
+                    _insert(conn, entry, cell_fn(entry))
+        # melhores de jogadores que já saíram das listas de top
+        for name, best in data.get("best_by_player", {}).items():
+            conn.execute(
+                "INSERT INTO player_best (name, best) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET best = max(best, excluded.best)",
+                (name, best),
+            )
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+    return True
+
+
+# ----------------------------
+# Consultas (top-N direto no banco)
+# ----------------------------
+def top_overall(conn: sqlite3.Connection, n: int) -> List[Dict]:
+    rows = conn.execute(
+        f"SELECT {ENTRY_COLS} FROM games ORDER BY score DESC, ts, id LIMIT ?", (n,)
+    )
+    return [_row_to_entry(r) for r in rows]
+
+
+def top_by_mode(conn: sqlite3.Connection, mode: str, n: int) -> List[Dict]:
+    rows = conn.execute(
+        f"SELECT {ENTRY_COLS} FROM games WHERE mode = ? ORDER BY score DESC, ts, id LIMIT ?",
+        (mode, n),
+    )
+    return [_row_to_entry(r) for r in rows]
+
+
+def top_all_modes(conn: sqlite3.Connection, n: int) -> Dict[str, List[Dict]]:
+    rows = conn.execute(
+        f"""
+        SELECT {ENTRY_COLS} FROM (
+            SELECT {ENTRY_COLS}, ROW_NUMBER() OVER (
+                PARTITION BY mode ORDER BY score DESC, ts, id
+            ) AS rn
+            FROM games
+        )
+        WHERE rn <= ?
+        ORDER BY mode, rn
+        """,
+        (n,),
+    )
+    by_mode: Dict[str, List[Dict]] = {}
+    for r in rows:
+        by_mode.setdefault(r["mode"], []).append(_row_to_entry(r))
+    return by_mode
+
+
+def top_by_cell(conn: sqlite3.Connection, cell: str, n: int) -> List[Dict]:
+    rows = conn.execute(
+        f"SELECT {ENTRY_COLS} FROM games WHERE cell = ? ORDER BY score DESC, ts, id LIMIT ?",
+        (cell, n),
+    )
+    return [_row_to_entry(r) for r in rows]
+
+
+def top_all_cells(conn: sqlite3.Connection, n: int) -> Dict[str, List[Dict]]:
+    rows = conn.execute(
+        f"""
+        SELECT {ENTRY_COLS}, cell FROM (
+            SELECT {ENTRY_COLS}, cell, ROW_NUMBER() OVER (
+                PARTITION BY cell ORDER BY score DESC, ts, id
+            ) AS rn
+            FROM games
+            WHERE cell IS NOT NULL
+        )
+        WHERE rn <= ?
+        ORDER BY cell, rn
+        """,
+        (n,),
+    )
+    by_cell: Dict[str, List[Dict]] = {}
+    for r in rows:
+        by_cell.setdefault(r["cell"], []).append(_row_to_entry(r))
+    return by_cell
+
+
+def top_since(conn: sqlite3.Connection, since: int, n: int) -> List[Dict]:
+    rows = conn.execute(
+        f"SELECT {ENTRY_COLS} FROM games WHERE ts >= ? ORDER BY score DESC, ts, id LIMIT ?",
+        (since, n),
+    )
+    return [_row_to_entry(r) for r in rows]
+
+
+def _window_start(ordinal: int) -> int:
+    return int(time.mktime(date.fromordinal(ordinal).timetuple()))
+
+
+def top_today(conn: sqlite3.Connection, n: int) -> List[Dict]:
+    return top_since(conn, _window_start(day_key(int(time.time()))), n)
+
+
+def top_this_week(conn: sqlite3.Connection, n: int) -> List[Dict]:
+    return top_since(conn, _window_start(week_key(int(time.time()))), n)
+
+
+def best_of(conn: sqlite3.Connection, name: str) -> int:
+    row = conn.execute("SELECT best FROM player_best WHERE name = ?", (name,)).fetchone()
+    return row["best"] if row else 0
+
+
+def best_by_player(conn: sqlite3.Connection) -> Dict[str, int]:
+    rows = conn.execute("SELECT name, best FROM player_best ORDER BY best DESC")
+    return {r["name"]: r["best"] for r in rows}
+
+
+def last_id(conn: sqlite3.Connection) -> int:
+    # sobe a cada partida gravada, por qualquer processo
+    return conn.execute("SELECT coalesce(max(id), 0) FROM games").fetchone()[0]
+
+
+def load_view(conn: sqlite3.Connection, top_n: int = 20) -> Dict:
+    # mesmo formato do rankings.json, pra UI não precisar saber do banco
+    conn.execute("BEGIN")
+    try:
+        view = {
+            "overall": top_overall(conn, top_n),
+            "by_mode": top_all_modes(conn, top_n),
+            "best_by_player": best_by_player(conn),
+            "daily": top_today(conn, top_n),
+            "weekly": top_this_week(conn, top_n),
+            "by_cell": top_all_cells(conn, top_n),
+        }
+    finally:
+        conn.execute("COMMIT")
+    return view
+
+
+def claim(conn: sqlite3.Connection, game_id: str, expires: int) -> bool:
+    # True só para o primeiro que reivindicar o id (vale entre processos)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM claimed_games WHERE expires < ?", (int(time.time()),))
+        cur = conn.execute("INSERT OR IGNORE INTO claimed_games (id, expires) VALUES (?, ?)",
+                           (game_id, expires))
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+    return cur.rowcount == 1
+
+
+def add_entry(conn: sqlite3.Connection, data: Dict, entry: Dict, top_n: int = 20,
+              cell: Optional[str] = None) -> int:
+    # grava e recarrega só as partes da visão que essa partida pode ter mudado
+    # (inclui o que outros processos gravaram nesse meio tempo)
+    insert_entry(conn, entry, cell)
+    if cell is not None:
+        data["by_cell"][cell] = top_by_cell(conn, cell, top_n)
+    data["overall"] = top_overall(conn, top_n)
+    data["by_mode"][entry["mode"]] = top_by_mode(conn, entry["mode"], top_n)
+    data["daily"] = top_today(conn, top_n)
+    data["weekly"] = top_this_week(conn, top_n)
+    # devolve o melhor atual do jogador; quem chama atualiza best_by_player
+    return best_of(conn, entry["name"])
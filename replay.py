@@ -0,0 +1,200 @@
+import os
+import random
+import struct
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+REPLAY_DIR = "replays"
+MAGIC = b"MGRP"
+VERSION = 2
+
+# cabeçalho: magic, versão, seed, modo, max_number, time_limit (0 = sem),
+# rodadas configuradas, ts, tamanho do nome (o nome em UTF-8 vem logo depois)
+HEADER = struct.Struct("<4sBQBHBHqB")
+# uma rodada: resposta digitada, flags, tempo em ms, questão (operação + faixa
+# do modo adaptativo, ver adaptive.question_code) — 14 bytes, sem padding
+ROUND = struct.Struct("<qBIB")
+ROUND_DTYPE = [("answer", "<i8"), ("flags", "u1"), ("elapsed_ms", "<u4"), ("code", "u1")]
+# versão 1 não tinha o byte da questão
+ROUND_V1 = struct.Struct("<qBI")
+ROUND_V1_DTYPE = ROUND_DTYPE[:3]
+
+MODE_CODES = ("add", "sub", "mul", "div", "mix")
+
+FLAG_CORRECT = 1
+FLAG_TIMEOUT = 2
+FLAG_INVALID = 4   # resposta não numérica
+
+_INT64_MIN, _INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+
+def new_seed() -> int:
+    return random.SystemRandom().getrandbits(64)
+
+
+def question_rng(seed: int) -> random.Random:
+    # fluxo de questões da partida: mesma seed -> mesmas questões
+    return random.Random(seed)
+
+
+def pick_rng(seed: int) -> random.Random:
+    # sorteio de operação do modo adaptativo, separado do fluxo de questões
+    return random.Random(seed ^ 0x5A5A5A5A5A5A5A5A)
+
+
+@dataclass
+class Replay:
+    seed: int
+    mode_key: str
+    max_number: int
+    time_limit: Optional[int]
+    rounds: int
+    ts: int
+    name: str
+    data: bytes  # registros de rodada, round_struct.size bytes cada
+    version: int = VERSION
+
+    @property
+    def round_struct(self) -> struct.Struct:
+        return ROUND if self.version >= 2 else ROUND_V1
+
+    def __len__(self) -> int:
+        return len(self.data) // self.round_struct.size
+
+    def records(self) -> List[Tuple[int, int, int, int]]:
+        # (resposta, flags, ms, questão); versão 1 vem com questão 0
+        if self.version >= 2:
+            return list(ROUND.iter_unpack(self.data))
+        return [r + (0,) for r in ROUND_V1.iter_unpack(self.data)]
+
+
+# ----------------------------
+# Gravação
+# ----------------------------
+class ReplayRecorder:
+    def __init__(self, seed: int, mode_key: str, max_number: int,
+                 time_limit: Optional[int], rounds: int, name: str):
+        self.seed = seed
+        self.mode_key = mode_key
+        self.max_number = max_number
+        self.time_limit = time_limit
+        self.rounds = rounds
+        self.name = name
+        self._buf = bytearray()
+
+    def add(self, answer: Optional[int], correct: bool, elapsed_ms: int,
+            code: int = 0, timeout: bool = False) -> None:
+        flags = (FLAG_CORRECT if correct else 0) | (FLAG_TIMEOUT if timeout else 0)
+        if answer is None:
+            flags |= FLAG_INVALID
+            answer = 0
+        answer = max(_INT64_MIN, min(_INT64_MAX, answer))
+        self._buf += ROUND.pack(answer, flags, max(0, min(elapsed_ms, 0xFFFFFFFF)), code)
+
+    def to_bytes(self, ts: int) -> bytes:
+        name = self.name.encode("utf-8")[:255]
+        head = HEADER.pack(MAGIC, VERSION, self.seed, MODE_CODES.index(self.mode_key),
+                           self.max_number, self.time_limit or 0, self.rounds, ts, len(name))
+        return head + name + bytes(self._buf)
+
+    def save(self, ts: int, path: str = REPLAY_DIR) -> str:
+        os.makedirs(path, exist_ok=True)
+        fname = os.path.join(path, f"{ts}_{self.seed:016x}.mgr")
+        with open(fname, "wb") as f:
+            f.write(self.to_bytes(ts))
+        return fname
+
+
+# ----------------------------
+# Leitura
+# ----------------------------
+def parse(buf: bytes) -> Replay:
+    magic, version, seed, mode, max_n, tl, rounds, ts, name_len = HEADER.unpack_from(buf)
+    if magic != MAGIC or not 1 <= version <= VERSION:
+        raise ValueError("arquivo de replay inválido")
+    start = HEADER.size + name_len
+    name = bytes(buf[HEADER.size:start]).decode("utf-8", errors="replace")
+    size = (ROUND if version >= 2 else ROUND_V1).size
+    body = buf[start:]
+    body = body[:len(body) - len(body) % size]
+    return Replay(seed, MODE_CODES[mode], max_n, tl or None, rounds, ts, name, bytes(body), version)
+
+
+def load(path: str) -> Replay:
+    with open(path, "rb") as f:
+        return parse(f.read())
+
+
+# ----------------------------
+# Re-pontuação e auditoria
+# ----------------------------
+def rescore(rep: Replay) -> Dict:
+    # Refaz a pontuação só a partir dos registros (sem regerar questões).
+    # Com numpy é vetorizado (milhões de rodadas por segundo): a streak de cada
+    # acerto é a distância até o último erro. A fórmula é a de calc_points.
+    from main import _numpy, calc_points, level_from_score
+
+    n = len(rep)
+    # numpy só é importado aqui (o app web importa este módulo na subida)
+    np = _numpy() if n else None
+    if np is not None:
+        rec = np.frombuffer(rep.data, dtype=np.dtype(
+            ROUND_DTYPE if rep.version >= 2 else ROUND_V1_DTYPE))
+        ok = (rec["flags"] & (FLAG_CORRECT | FLAG_TIMEOUT | FLAG_INVALID)) == FLAG_CORRECT
+        idx = np.arange(n)
+        last_miss = np.maximum.accumulate(np.where(ok, -1, idx))
+        streak = idx - last_miss
+        pts = 10 + np.minimum(streak, 10) * 2
+        if rep.time_limit is not None:
+            elapsed = rec["elapsed_ms"] / 1000.0
+            pts += np.maximum(0, np.floor((rep.time_limit - elapsed) * 2)).astype(np.int64)
+        score = int(pts[ok].sum())
+        correct = int(ok.sum())
+    else:
+        score = correct = streak = 0
+        for _, flags, elapsed_ms, _ in rep.records():
+            ok = flags & (FLAG_CORRECT | FLAG_TIMEOUT | FLAG_INVALID) == FLAG_CORRECT
+            streak = streak + 1 if ok else 0
+            correct += ok
+            score += calc_points(ok, streak, rep.time_limit, elapsed_ms / 1000)
+    return {
+        "name": rep.name,
+        "score": score,
+        "correct": correct,
+        "played": n,
+        "rounds": rep.rounds,
+        "level": level_from_score(score),
+    }
+
+
+def verify(rep: Replay) -> List[int]:
+    # Auditoria completa: regera as questões pela seed e confere se a flag de
+    # acerto de cada rodada bate com a resposta digitada. Devolve as rodadas
+    # (0-based) que não batem.
+    from adaptive import RANGES, decode_question
+    from main import QuestionSampler
+
+    qrng = question_rng(rep.seed)
+    adaptive = rep.max_number == 0
+    if adaptive and rep.version < 2:
+        raise ValueError("replay adaptativo sem o registro das questões")
+    fixed = QuestionSampler(rep.mode_key, rep.max_number, qrng)
+    by_range: Dict[int, QuestionSampler] = {}
+    bad = []
+    for i, (answer, flags, elapsed_ms, code) in enumerate(rep.records()):
+        if adaptive:
+            # operação e faixa vieram das estatísticas do jogador na hora;
+            # a conta em si sai do mesmo rng de questões
+            op, r = decode_question(code)
+            if r not in by_range:
+                by_range[r] = QuestionSampler(rep.mode_key, RANGES[r], qrng)
+            _, expected = by_range[r].next(op)
+        else:
+            _, expected = fixed.next()
+        timed_out = rep.time_limit is not None and elapsed_ms > rep.time_limit * 1000
+        claims = bool(flags & FLAG_CORRECT)
+        really = not (flags & FLAG_INVALID) and not timed_out and answer == expected
+        if claims != really or bool(flags & FLAG_TIMEOUT) != timed_out:
+            bad.append(i)
+    return bad
+
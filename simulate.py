@@ -0,0 +1,187 @@
+import argparse
+import math
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import engine
+import main
+
+CHUNK = 2000  # partidas por tarefa do pool
+
+
+@dataclass
+class BotProfile:
+    # acerto: chance de responder certo; latência: log-normal em torno da
+    # mediana (segundos), sigma controla a cauda dos lentos
+    accuracy: float = 0.8
+    latency_median: float = 2.5
+    latency_sigma: float = 0.5
+    # latência extra por dígito a mais na resposta (contas maiores demoram mais)
+    latency_per_digit: float = 0.0
+
+
+@dataclass
+class SimConfig:
+    mode_key: str = "mix"
+    max_number: int = 10
+    time_limit: Optional[int] = None
+    rounds: int = 10
+
+
+# ----------------------------
+# Bots
+# ----------------------------
+def play_bot(cfg: SimConfig, bot: BotProfile, rng: random.Random) -> engine.GameEngine:
+    game = engine.GameEngine(cfg.mode_key, cfg.max_number, cfg.time_limit, cfg.rounds,
+                             seed=rng.getrandbits(64))
+    mu = math.log(bot.latency_median)
+    while True:
+        q = game.next_question()
+        if q is None:
+            return game
+        _, answer = q
+        secs = rng.lognormvariate(mu, bot.latency_sigma)
+        if bot.latency_per_digit:
+            secs += bot.latency_per_digit * (len(str(abs(answer))) - 1)
+        elapsed_ms = int(secs * 1000)
+        if cfg.time_limit is not None and elapsed_ms > cfg.time_limit * 1000:
+            game.answer(None, elapsed_ms)
+        elif rng.random() < bot.accuracy:
+            game.answer(str(answer), elapsed_ms)
+        else:
+            game.answer(str(answer + rng.choice((-1, 1))), elapsed_ms)
+
+
+def run_chunk(cfg: SimConfig, bot: BotProfile, games: int, seed: int, keep: int) -> Dict:
+    # roda num processo do pool; devolve só agregados (mais `keep` partidas
+    # completas, para gravar no ranking)
+    rng = random.Random(seed)
+    scores: Counter = Counter()
+    correct = 0
+    kept: List[Dict] = []
+    for i in range(games):
+        game = play_bot(cfg, bot, rng)
+        scores[game.score] += 1
+        correct += game.correct_count
+        if i < keep:
+            kept.append(game.summary())
+    return {"scores": scores, "correct": correct, "games": games, "kept": kept}
+
+
+def simulate(cfg: SimConfig, bot: BotProfile, games: int, workers: Optional[int] = None,
+             seed: Optional[int] = None, keep: int = 0) -> Dict:
+    master = random.Random(seed)
+    chunks = []
+    left = games
+    while left > 0:
+        n = min(CHUNK, left)
+        # keep é dividido entre os primeiros chunks
+        k = min(n, max(0, keep - (games - left)))
+        chunks.append((n, master.getrandbits(64), k))
+        left -= n
+
+    total: Counter = Counter()
+    correct = 0
+    kept: List[Dict] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_chunk, cfg, bot, n, s, k) for n, s, k in chunks]
+        for fut in futures:
+            part = fut.result()
+            total.update(part["scores"])
+            correct += part["correct"]
+            kept.extend(part["kept"])
+    return {"scores": total, "correct": correct, "games": games, "kept": kept}
+
+
+# ----------------------------
+# Relatório
+# ----------------------------
+def percentile(scores: Counter, q: float) -> int:
+    target = q * sum(scores.values())
+    acc = 0
+    for score in sorted(scores):
+        acc += scores[score]
+        if acc >= target:
+            return score
+    return 0
+
+
+def report(res: Dict, cfg: SimConfig, elapsed: float) -> None:
+    scores = res["scores"]
+    n = res["games"]
+    mean = sum(s * c for s, c in scores.items()) / n
+    var = sum(c * (s - mean) ** 2 for s, c in scores.items()) / n
+    print(f"{n:,} partidas em {elapsed:.1f}s ({n / elapsed:,.0f} partidas/s)".replace(",", " "))
+    print(f"acerto médio: {res['correct'] / (n * cfg.rounds):.1%}")
+    print(f"pontos: média {mean:.1f} | desvio {math.sqrt(var):.1f} | "
+          f"pontos/rodada {mean / cfg.rounds:.1f}")
+    print("percentis: " + " | ".join(
+        f"p{int(q * 100)} {percentile(scores, q)}" for q in (0.1, 0.5, 0.9, 0.99)))
+    levels: Counter = Counter()
+    for s, c in scores.items():
+        levels[main.level_from_score(s)] += c
+    print("nível final: " + " | ".join(
+        f"{lvl}: {c / n:.1%}" for lvl, c in sorted(levels.items())))
+
+
+def record(kept: List[Dict], cfg: SimConfig) -> None:
+    # teste de carga do ranking: grava as partidas pelo mesmo caminho do jogo
+    # (backend conforme MATE_STORAGE)
+    mode_label = next(label for label, key in main.MODES.values() if key == cfg.mode_key)
+    diff_label = next((label for label, max_n in main.DIFFICULTIES.values()
+                       if max_n == cfg.max_number), f"até {cfg.max_number}")
+    data = main.load_data()
+    ts = main.now_ts()
+    start = time.perf_counter()
+    for i, g in enumerate(kept):
+        entry = {
+            "name": f"bot{i % 1000:03d}",
+            "score": g["score"],
+            "mode": mode_label,
+            "difficulty": diff_label,
+            "mode_key": cfg.mode_key,
+            "time_limit": cfg.time_limit,
+            "rounds": cfg.rounds,
+            "ts": ts + i,
+        }
+        main.record_result(data, entry, top_n=20)
+    main.save_data(data)
+    elapsed = time.perf_counter() - start
+    print(f"ranking: {len(kept)} partidas gravadas em {elapsed:.2f}s "
+          f"({len(kept) / elapsed:,.0f}/s, backend {main.STORAGE_BACKEND})".replace(",", " "))
+
+
+def cli(argv: List[str]) -> int:
+    p = argparse.ArgumentParser(description="Simulação de partidas com bots (balanceamento e carga)")
+    p.add_argument("-n", "--games", type=int, default=100_000)
+    p.add_argument("--mode", default="mix", choices=list(main.OPS) + ["mix"])
+    p.add_argument("--max", type=int, default=10, help="números até (10, 30, 100)")
+    p.add_argument("--time-limit", type=int, default=None)
+    p.add_argument("--rounds", type=int, default=10)
+    p.add_argument("--accuracy", type=float, default=0.8)
+    p.add_argument("--latency", type=float, default=2.5, help="mediana do tempo de resposta (s)")
+    p.add_argument("--sigma", type=float, default=0.5, help="espalhamento log-normal da latência")
+    p.add_argument("--per-digit", type=float, default=0.0, help="segundos extras por dígito da resposta")
+    p.add_argument("--workers", type=int, default=None, help="processos (padrão: todos os núcleos)")
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--record", type=int, default=0, metavar="N",
+                   help="grava N partidas no ranking (teste de carga do store)")
+    args = p.parse_args(argv)
+
+    cfg = SimConfig(args.mode, args.max, args.time_limit, args.rounds)
+    bot = BotProfile(args.accuracy, args.latency, args.sigma, args.per_digit)
+    start = time.perf_counter()
+    res = simulate(cfg, bot, args.games, args.workers, args.seed, keep=args.record)
+    report(res, cfg, time.perf_counter() - start)
+    if args.record:
+        record(res["kept"], cfg)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli(sys.argv[1:]))
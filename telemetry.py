@@ -0,0 +1,170 @@
+import atexit
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterator, Optional, Tuple
+
+TELEMETRY_FILE = "telemetry.ndjson"
+CAPACITY = 4096        # eventos em memória; se o disco travar, os mais antigos caem
+FLUSH_INTERVAL = 1.0   # segundos entre gravações
+
+
+# ----------------------------
+# Coleta (buffer circular + thread de gravação)
+# ----------------------------
+class TelemetryLog:
+    # record() só põe o evento num deque de tamanho fixo (O(1), sem I/O);
+    # uma thread em segundo plano esvazia o buffer no arquivo NDJSON a cada
+    # FLUSH_INTERVAL ou quando ele passa da metade. O loop do jogo nunca
+    # espera o disco.
+
+    def __init__(self, path: str = TELEMETRY_FILE, capacity: int = CAPACITY,
+                 interval: float = FLUSH_INTERVAL):
+        self.path = path
+        self.capacity = capacity
+        self.interval = interval
+        self.dropped = 0
+        self._buf: deque = deque(maxlen=capacity)
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._io_lock = threading.Lock()
+
+    def record(self, event: Dict) -> None:
+        if self._closed:
+            return
+        event.setdefault("ts", time.time_ns() // 1_000_000)
+        if len(self._buf) == self.capacity:
+            self.dropped += 1
+        self._buf.append(event)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+            self._thread.start()
+        if len(self._buf) * 2 >= self.capacity:
+            self._wake.set()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        # esvazia o buffer no arquivo; devolve quantos eventos foram gravados
+        with self._io_lock:
+            lines = []
+            while True:
+                try:
+                    ev = self._buf.popleft()
+                except IndexError:
+                    break
+                lines.append(json.dumps(ev, ensure_ascii=False, separators=(",", ":")))
+            if not lines:
+                return 0
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            return len(lines)
+
+    def close(self) -> None:
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+
+_log: Optional[TelemetryLog] = None
+
+
+def log() -> TelemetryLog:
+    global _log
+    if _log is None:
+        _log = TelemetryLog(os.environ.get("MATE_TELEMETRY", TELEMETRY_FILE))
+        atexit.register(_log.close)
+    return _log
+
+
+# ----------------------------
+# Quantis em streaming
+# ----------------------------
+class QuantileSketch:
+    # Histograma em baldes logarítmicos (estilo DDSketch): cada valor cai no
+    # balde ceil(log_gamma(x)), então qualquer quantil sai com erro relativo
+    # <= accuracy, em memória proporcional a log(max/min), não ao número de
+    # amostras. Dois sketches se somam balde a balde.
+
+    def __init__(self, accuracy: float = 0.01):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        if x <= 0:
+            self.zeros += 1
+            return
+        i = math.ceil(math.log(x) / self._log_gamma)
+        self.buckets[i] = self.buckets.get(i, 0) + 1
+
+    def merge(self, other: "QuantileSketch") -> None:
+        self.count += other.count
+        self.zeros += other.zeros
+        for i, c in other.buckets.items():
+            self.buckets[i] = self.buckets.get(i, 0) + c
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for i in sorted(self.buckets):
+            seen += self.buckets[i]
+            if seen > rank:
+                # meio do balde (gamma^(i-1), gamma^i]
+                return 2 * self.gamma ** i / (self.gamma + 1)
+        return self.gamma ** max(self.buckets)
+
+
+def read_events(path: str = TELEMETRY_FILE) -> Iterator[Dict]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break  # gravação interrompida no meio da linha
+            yield json.loads(line)
+
+
+def report(path: str = TELEMETRY_FILE, out=sys.stdout) -> int:
+    # p50/p95/p99 de latência por operação × dificuldade, lendo o log uma vez
+    from main import DIFFICULTIES
+
+    labels = {max_n: label for label, max_n in DIFFICULTIES.values() if max_n}
+    groups: Dict[Tuple[str, int], QuantileSketch] = {}
+    hits: Dict[Tuple[str, int], int] = {}
+    for ev in read_events(path):
+        key = (ev["op"], ev["max"])
+        sk = groups.get(key)
+        if sk is None:
+            sk = groups[key] = QuantileSketch()
+            hits[key] = 0
+        sk.add(ev["latency_ns"] / 1_000_000)
+        hits[key] += bool(ev["correct"])
+
+    if not groups:
+        print("Nenhum evento de telemetria.", file=out)
+        return 0
+    print(f"{'operação':<9} {'dificuldade':<12} {'n':>8} {'acerto':>7} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}", file=out)
+    for (op, max_n), sk in sorted(groups.items()):
+        label = labels.get(max_n, f"até {max_n}")
+        print(f"{op:<9} {label:<12} {sk.count:>8} {hits[(op, max_n)] / sk.count:>7.0%} "
+              f"{sk.quantile(0.5):>8.0f} {sk.quantile(0.95):>8.0f} {sk.quantile(0.99):>8.0f}",
+              file=out)
+    return sum(sk.count for sk in groups.values())
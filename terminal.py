@@ -0,0 +1,231 @@
+import atexit
+import codecs
+import os
+import selectors
+import shutil
+import sys
+import time
+from typing import List, Optional, Tuple
+
+try:
+    import termios
+except ImportError:  # Windows: sem contagem ao vivo, ver timed_input
+    termios = None
+
+
+# ----------------------------
+# Renderer ANSI
+# ----------------------------
+class FrameWriter:
+    # Fica no lugar de sys.stdout. Tudo que é impresso entre um clear() e o
+    # próximo input() forma um quadro; no flush (o input() sempre dá flush
+    # antes de ler) o quadro vai pro terminal numa escrita só, reescrevendo
+    # apenas as linhas que mudaram em relação ao quadro anterior.
+    # O texto impresso depois do input (e o eco do que o jogador digitou)
+    # fica abaixo do quadro; essas linhas são sempre reescritas no próximo.
+
+    def __init__(self, out):
+        self._out = out
+        self._frame: Optional[List[str]] = None  # quadro sendo montado
+        self._pending: List[str] = []            # texto depois do quadro
+        self._prev: List[str] = []               # linhas do quadro anterior na tela
+        self._valid = False                      # _prev bate com a tela?
+        self._rows_used = 0
+
+    # ---------- interface de arquivo ----------
+    def write(self, s: str) -> int:
+        if self._frame is not None:
+            self._frame.append(s)
+        else:
+            self._pending.append(s)
+            self._rows_used += s.count("\n")
+        return len(s)
+
+    def flush(self) -> None:
+        parts = []
+        if self._frame is not None:
+            parts.append(self._draw("".join(self._frame)))
+            self._frame = None
+        elif self._pending:
+            self._rows_used += 1  # flush fora do quadro costuma ser um input()
+        parts.extend(self._pending)
+        self._pending = []
+        if not parts:
+            return
+        data = "".join(parts)
+        buf = getattr(self._out, "buffer", None)
+        if buf is not None:
+            buf.write(data.encode(self._out.encoding or "utf-8", errors="replace"))
+            buf.flush()
+        else:
+            self._out.write(data)
+            self._out.flush()
+        if self._rows_used >= shutil.get_terminal_size().lines:
+            # a tela rolou: as linhas antigas não estão mais onde achamos
+            self._valid = False
+
+    def fileno(self) -> int:
+        # input() só usa o readline se stdout for o terminal de verdade
+        return self._out.fileno()
+
+    def isatty(self) -> bool:
+        return self._out.isatty()
+
+    def __getattr__(self, name):
+        return getattr(self._out, name)
+
+    # ---------- quadros ----------
+    def new_frame(self) -> None:
+        self.flush()
+        self._frame = []
+
+    def _draw(self, text: str) -> str:
+        lines = text.split("\n")
+        last = lines.pop()  # linha sem \n no fim (ou "")
+        size = shutil.get_terminal_size()
+        too_big = len(lines) + 1 >= size.lines or any(len(l) >= size.columns for l in lines + [last])
+        prev = self._prev if self._valid and not too_big else None
+        self._prev = lines
+        self._valid = not too_big
+        self._rows_used = len(lines) + 1
+        if prev is None:
+            # primeiro quadro, tela rolada ou quadro maior que a tela
+            return "\x1b[H\x1b[2J" + text
+        out = []
+        for i, line in enumerate(lines):
+            if i < len(prev) and prev[i] == line:
+                continue
+            out.append(f"\x1b[{i + 1};1H{line}\x1b[K")
+        # cursor no fim do quadro e o resto da tela (resposta anterior etc.) apagado
+        out.append(f"\x1b[{len(lines) + 1};1H{last}\x1b[J")
+        return "".join(out)
+
+
+def _supports_ansi(out) -> bool:
+    if not hasattr(out, "isatty") or not out.isatty():
+        return False
+    if os.environ.get("TERM", "") in ("", "dumb") and os.name != "nt":
+        return False
+    if os.name == "nt":
+        # console do Windows: liga o processamento de sequências VT
+        try:
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            handle = kernel32.GetStdHandle(-11)
+            mode = ctypes.c_uint32()
+            if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+                return False
+            return bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004))
+        except (AttributeError, OSError):
+            return False
+    return True
+
+
+_writer: Optional[FrameWriter] = None
+_checked = False
+
+
+def writer() -> Optional[FrameWriter]:
+    # instala o FrameWriter na primeira tela; None em terminal burro/pipe
+    global _writer, _checked
+    if not _checked:
+        _checked = True
+        if os.environ.get("MATE_TERM") != "dumb" and _supports_ansi(sys.stdout):
+            _writer = FrameWriter(sys.stdout)
+            sys.stdout = _writer
+            atexit.register(_writer.flush)
+    return _writer
+
+
+def clear() -> None:
+    w = writer()
+    if w is not None:
+        w.new_frame()
+    else:
+        # terminal sem ANSI (ou saída redirecionada): só separa as telas
+        print()
+
+
+# ----------------------------
+# Entrada com contagem regressiva
+# ----------------------------
+TICK = 0.1  # de quanto em quanto tempo o relógio na tela é atualizado
+
+
+def timed_input(prompt: str, time_limit: float) -> Tuple[Optional[str], int]:
+    # Lê uma linha com relógio ao vivo e corte exato em time_limit segundos.
+    # Devolve (texto, nanossegundos decorridos); texto None = tempo esgotado.
+    # Espera no selectors (sem busy-wait): acorda só quando chega tecla ou
+    # na hora de atualizar o relógio.
+    head, _, line = prompt.rpartition("\n")
+    if head:
+        print(head)
+    sys.stdout.flush()
+    start = time.perf_counter_ns()
+    if termios is None or not sys.stdin.isatty():
+        # sem termios (Windows) ou entrada redirecionada: o tempo só é
+        # conferido depois do Enter, como antes
+        raw = input(line)
+        return raw, time.perf_counter_ns() - start
+
+    fd = sys.stdin.fileno()
+    deadline = start + int(time_limit * 1_000_000_000)
+    decoder = codecs.getincrementaldecoder(sys.stdin.encoding or "utf-8")(errors="replace")
+    typed: List[str] = []
+    in_escape = False  # setas etc. (ESC [ ... letra) são ignoradas
+
+    old = termios.tcgetattr(fd)
+    new = termios.tcgetattr(fd)
+    new[3] &= ~(termios.ICANON | termios.ECHO)  # ISIG fica: Ctrl-C continua valendo
+    new[6][termios.VMIN] = 1
+    new[6][termios.VTIME] = 0
+    sel = selectors.DefaultSelector()
+    sel.register(fd, selectors.EVENT_READ)
+    try:
+        termios.tcsetattr(fd, termios.TCSANOW, new)
+        while True:
+            now = time.perf_counter_ns()
+            if now >= deadline:
+                # o que foi digitado atrasado não pode pular a próxima tela
+                termios.tcflush(fd, termios.TCIFLUSH)
+                _draw_prompt(line, typed, 0.0)
+                sys.stdout.write("\n")
+                sys.stdout.flush()
+                return None, now - start
+            left = (deadline - now) / 1_000_000_000
+            _draw_prompt(line, typed, left)
+            # acorda no próximo décimo de segundo do relógio (ou no prazo)
+            wait = min(left, (left % TICK) or TICK)
+            if not sel.select(wait):
+                continue
+            for ch in decoder.decode(os.read(fd, 1024)):
+                if in_escape:
+                    in_escape = not (ch.isalpha() or ch == "~")
+                elif ch == "\x1b":
+                    in_escape = True
+                elif ch in "\r\n":
+                    now = time.perf_counter_ns()
+                    _draw_prompt(line, typed, max(0.0, (deadline - now) / 1_000_000_000))
+                    sys.stdout.write("\n")
+                    sys.stdout.flush()
+                    return "".join(typed), now - start
+                elif ch in "\x7f\b":
+                    if typed:
+                        typed.pop()
+                elif ch == "\x04" and not typed:
+                    raise EOFError
+                elif ch == "\x15":  # Ctrl-U
+                    typed.clear()
+                elif ch.isprintable():
+                    typed.append(ch)
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, old)
+        sel.close()
+
+
+def _draw_prompt(line: str, typed: List[str], left: float) -> None:
+    # redesenho da mesma linha: vai direto pro terminal, sem passar pela
+    # contagem de linhas do FrameWriter
+    out = _writer._out if _writer is not None else sys.stdout
+    out.write(f"\r\x1b[K[{left:4.1f}s] {line}{''.join(typed)}")
+    out.flush()
@@ -0,0 +1,115 @@
+import base64
+import hashlib
+import hmac
+import struct
+import time
+from dataclasses import dataclass, replace
+from typing import Optional, Union
+
+# estado da partida antes da questão `index`: nonce da partida (a seed de
+# verdade é derivada dele com a chave), configuração, hora de emissão em ms,
+# o placar até aqui e o nome do jogador (hash). 36 bytes + 12 de MAC -> 64
+# caracteres base64url.
+PAYLOAD = struct.Struct("<QBHBHHqIHHI")
+MAC_SIZE = 12
+TOKEN_TTL_MS = 6 * 3600 * 1000   # partida largada há mais que isso não vale
+
+MODE_CODES = ("add", "sub", "mul", "div", "mix")
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class GameToken:
+    nonce: int
+    mode_key: str
+    max_number: int
+    time_limit: int      # 0 = sem tempo
+    rounds: int
+    index: int           # próxima questão a responder (== rounds: acabou)
+    issued_ms: int
+    score: int = 0
+    streak: int = 0
+    correct: int = 0
+    name_tag: int = 0    # ver name_tag(): a partida só vale para esse nome
+
+    def advance(self, **changes) -> "GameToken":
+        # próximo elo da corrente: questão seguinte, emitida agora
+        return replace(self, index=self.index + 1, issued_ms=now_ms(), **changes)
+
+    def forfeit(self) -> "GameToken":
+        # encerra a partida com o placar atual (as questões restantes não contam)
+        return replace(self, index=self.rounds, issued_ms=now_ms())
+
+
+def normalize_name(name: str) -> str:
+    # mesma limpeza que o app faz antes de gravar
+    return " ".join(str(name).split())[:24]
+
+
+def name_tag(name: str) -> int:
+    return int.from_bytes(hashlib.sha256(normalize_name(name).encode("utf-8")).digest()[:4], "little")
+
+
+def now_ms() -> int:
+    # relógio de parede: o token pode ser verificado por outro worker/máquina
+    return time.time_ns() // 1_000_000
+
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _unb64(s: str) -> bytes:
+    return base64.urlsafe_b64decode(s + "=" * (-len(s) % 4))
+
+
+# ----------------------------
+# Assinatura
+# ----------------------------
+class TokenSigner:
+    # HMAC-SHA256 truncado sobre o payload binário. Não guarda nada por
+    # sessão: qualquer processo com a mesma chave verifica qualquer token.
+
+    def __init__(self, secret: Union[str, bytes]):
+        if isinstance(secret, str):
+            secret = secret.encode("utf-8")
+        # chaves separadas pra assinatura e pra derivar a seed
+        self._mac_key = hmac.new(secret, b"mate-token", hashlib.sha256).digest()
+        self._seed_key = hmac.new(secret, b"mate-seed", hashlib.sha256).digest()
+
+    def game_seed(self, nonce: int) -> int:
+        # o cliente só vê o nonce; sem a chave não dá pra achar a seed (e
+        # buscar as respostas no /api/questions?seed=...)
+        mac = hmac.new(self._seed_key, nonce.to_bytes(8, "little"), hashlib.sha256).digest()
+        return int.from_bytes(mac[:8], "little")
+
+    def sign(self, tok: GameToken) -> str:
+        payload = PAYLOAD.pack(tok.nonce, MODE_CODES.index(tok.mode_key), tok.max_number,
+                               tok.time_limit, tok.rounds, tok.index, tok.issued_ms,
+                               tok.score, tok.streak, tok.correct, tok.name_tag)
+        mac = hmac.new(self._mac_key, payload, hashlib.sha256).digest()[:MAC_SIZE]
+        return _b64(payload + mac)
+
+    def verify(self, s: str, now: Optional[int] = None) -> GameToken:
+        try:
+            raw = _unb64(s)
+        except (ValueError, TypeError):
+            raise InvalidToken("token malformado")
+        if len(raw) != PAYLOAD.size + MAC_SIZE:
+            raise InvalidToken("token malformado")
+        payload, mac = raw[:PAYLOAD.size], raw[PAYLOAD.size:]
+        expected = hmac.new(self._mac_key, payload, hashlib.sha256).digest()[:MAC_SIZE]
+        if not hmac.compare_digest(mac, expected):
+            raise InvalidToken("assinatura inválida")
+        (nonce, mode, max_n, tl, rounds, index, issued,
+         score, streak, correct, tag) = PAYLOAD.unpack(payload)
+        if mode >= len(MODE_CODES):
+            raise InvalidToken("modo inválido")
+        now = now_ms() if now is None else now
+        if not issued - 5000 <= now <= issued + TOKEN_TTL_MS:
+            raise InvalidToken("token expirado")
+        return GameToken(nonce, MODE_CODES[mode], max_n, tl, rounds, index, issued,
+                         score, streak, correct, tag)
@@ -0,0 +1,502 @@
+// ---------- util ----------
+const $ = (id) => document.getElementById(id);
+
+function beep(type="ok"){
+  try{
+    const ctx = new (window.AudioContext || window.webkitAudioContext)();
+    const o = ctx.createOscillator();
+    const g = ctx.createGain();
+    o.type = "sine";
+    o.frequency.value = type==="ok" ? 660 : 220;
+    g.gain.value = 0.08;
+    o.connect(g); g.connect(ctx.destination);
+    o.start();
+    setTimeout(()=>{ o.stop(); ctx.close(); }, 80);
+  }catch(e){}
+}
+
+function setMsg(text, kind=""){
+  const m = $("msg");
+  m.textContent = text || "";
+  m.className = "msg " + kind;
+}
+
+function clamp(n, a, b){ return Math.max(a, Math.min(b, n)); }
+
+// ---------- ranking (local) ----------
+const RKEY = "mate_game_rank_v1";
+function loadRank(){
+  try { return JSON.parse(localStorage.getItem(RKEY) || "[]"); } catch { return []; }
+}
+function saveRank(list){
+  localStorage.setItem(RKEY, JSON.stringify(list.slice(0, 10)));
+}
+function addRank(entry){
+  const list = loadRank();
+  list.push(entry);
+  list.sort((a,b)=>b.score-a.score);
+  saveRank(list);
+  renderRank();
+}
+// ---------- ranking (global) ----------
+// GET com revalidação: sem partida nova o servidor responde 304 e o
+// navegador reaproveita o JSON que já tem
+function rankRow(e){
+  return {
+    name: e.name, score: e.score, modeLabel: e.mode, diffLabel: e.difficulty,
+    rounds: e.rounds, level: computeLevel(e.score),
+  };
+}
+async function fetchRank(){
+  if(live) return live.map(rankRow);
+  try{
+    const res = await fetch("/api/rankings?view=overall&limit=10", {cache:"no-cache"});
+    if(!res.ok) return null;
+    const body = await res.json();
+    return body.entries.map(rankRow);
+  }catch(e){
+    return null;
+  }
+}
+
+// ---------- ranking ao vivo ----------
+// /api/rankings/stream manda o top inteiro ao conectar e depois só as
+// posições que mudaram. Sem stream (ou servidor cheio), fica o GET acima.
+let live = null;
+function startLive(){
+  if(!window.EventSource) return;
+  const es = new EventSource("/api/rankings/stream");
+  es.addEventListener("snapshot", (ev)=>{
+    live = JSON.parse(ev.data).overall;
+    renderRank();
+  });
+  es.addEventListener("delta", (ev)=>{
+    const d = JSON.parse(ev.data);
+    if(!live || !d.overall) return;
+    for(const [i, item] of d.overall) live[i] = item;
+    live = live.filter(Boolean);
+    renderRank();
+  });
+  // derrubado por lentidão ou conexão caiu: o navegador reconecta sozinho
+  // e recebe um snapshot novo
+  es.addEventListener("reset", ()=>{ live = null; });
+  es.onerror = ()=>{ live = null; };
+}
+async function postJSON(url, body){
+  try{
+    const res = await fetch(url, {
+      method: "POST",
+      headers: {"Content-Type": "application/json"},
+      body: JSON.stringify(body),
+    });
+    return res.ok ? await res.json() : null;
+  }catch(e){
+    return null;
+  }
+}
+
+async function renderRank(){
+  // servidor fora do ar: mostra o ranking local do navegador
+  const list = (await fetchRank()) || loadRank();
+  const root = $("rank");
+  root.innerHTML = "";
+  if(list.length===0){
+    root.innerHTML = `<div class="rankItem"><span>Nenhum registro ainda.</span><span class="small">Jogue uma partida 🙂</span></div>`;
+    return;
+  }
+  list.slice(0,10).forEach((e, i)=>{
+    const medal = i===0 ? "🥇" : i===1 ? "🥈" : i===2 ? "🥉" : "🏅";
+    // nomes vêm de outros jogadores: só textContent, nunca innerHTML
+    const el = document.createElement("div");
+    el.className = "rankItem";
+    el.innerHTML = `
+      <div style="display:flex;gap:10px;align-items:center;">
+        <span class="badge"></span>
+        <div>
+          <div><b></b> <span class="pts"></span></div>
+          <div class="small info"></div>
+        </div>
+      </div>
+      <div class="small lvl"></div>
+    `;
+    el.querySelector(".badge").textContent = `${medal} #${i+1}`;
+    el.querySelector("b").textContent = e.name;
+    el.querySelector(".pts").textContent = `— ${e.score} pts`;
+    el.querySelector(".info").textContent = `${e.modeLabel} • ${e.diffLabel} • ${e.rounds ?? "?"}Q`;
+    el.querySelector(".lvl").textContent = `lvl ${e.level}`;
+    root.appendChild(el);
+  });
+}
+
+// ---------- game ----------
+const MODES = {
+  add: "Soma",
+  sub: "Subtração",
+  mul: "Multiplicação",
+  div: "Divisão",
+  mix: "Misto",
+};
+const DIFFS = {
+  easy:   {label:"Fácil",  max:10},
+  medium: {label:"Médio",  max:30},
+  hard:   {label:"Difícil",max:100},
+};
+
+let st = {
+  name:"",
+  mode:"mix",
+  diff:"easy",
+  roundsTotal:10,
+  timeLimit:8,
+  score:0,
+  streak:0,
+  lives:3,
+  round:0,
+  level:1,
+  qText:"—",
+  qAnswer:null,
+  qStart:0,
+  perms:{},
+  questions:null,
+  token:null,
+  played:0,
+  busy:false,
+  over:true,
+  timer:null
+};
+
+function computeLevel(score){
+  return 1 + Math.floor(score / 120);
+}
+
+function pickOp(){
+  if(st.mode !== "mix") return st.mode;
+  const ops = ["add","sub","mul","div"];
+  return ops[Math.floor(Math.random()*ops.length)];
+}
+
+// ---------- questões sem repetição ----------
+// Cada operação percorre seu espaço de operandos numa ordem embaralhada
+// (rede de Feistel + cycle walking, igual ao QuestionSampler do main.py):
+// não repete conta na partida até esgotar, O(1) por questão.
+function opRange(op, maxN){
+  if(op==="add" || op==="sub") return maxN;
+  if(op==="mul") return Math.max(3, Math.floor(maxN/2));
+  return Math.max(2, Math.floor(maxN/3));
+}
+function randomKeys(){
+  const keys = new Uint32Array(4);
+  if(window.crypto && crypto.getRandomValues) crypto.getRandomValues(keys);
+  else for(let i=0;i<4;i++) keys[i] = Math.floor(Math.random()*4294967296);
+  return keys;
+}
+function makePerm(size){
+  let half = 1;
+  while((1 << (2*half)) < size) half++;
+  return {size, half, mask:(1 << half) - 1, keys:randomKeys(), next:0};
+}
+function permute(p, x){
+  let l = x >>> p.half, r = x & p.mask;
+  for(const k of p.keys){
+    let f = Math.imul((r ^ k) >>> 0, 0x45D9F3B) >>> 0;
+    f = (f ^ (f >>> 16)) & p.mask;
+    const t = r; r = l ^ f; l = t;
+  }
+  return (l << p.half) | r;
+}
+function permNext(p){
+  if(p.next >= p.size){ p.keys = randomKeys(); p.next = 0; }
+  let x = permute(p, p.next);
+  while(x >= p.size) x = permute(p, x);
+  p.next += 1;
+  return x;
+}
+
+function makeQuestion(){
+  // partida vinda do servidor (/api/game): só o texto, quem confere é o
+  // /api/answer; senão gera aqui mesmo
+  const q = st.questions && st.questions[st.round - 1];
+  if(q){
+    st.qText = q;
+    st.qAnswer = null;
+    return;
+  }
+  const maxN = DIFFS[st.diff].max;
+  const op = pickOp();
+  const hi = opRange(op, maxN);
+  if(!st.perms[op]) st.perms[op] = makePerm(op==="sub" ? hi*(hi+1)/2 : hi*hi);
+  const idx = permNext(st.perms[op]);
+
+  let x, y;
+  if(op==="sub"){
+    // pares x >= y: "7 - 3" e "3 - 7" são a mesma conta
+    let t = Math.floor((Math.sqrt(8*idx + 1) - 1) / 2);
+    if(t*(t+1)/2 > idx) t -= 1;
+    x = t + 1; y = idx - t*(t+1)/2 + 1;
+  }else{
+    x = Math.floor(idx / hi) + 1; y = (idx % hi) + 1;
+  }
+
+  if(op==="add"){
+    st.qText = `${x} + ${y}`;
+    st.qAnswer = x + y;
+    return;
+  }
+  if(op==="sub"){
+    st.qText = `${x} - ${y}`;
+    st.qAnswer = x - y;
+    return;
+  }
+  if(op==="mul"){
+    st.qText = `${x} × ${y}`;
+    st.qAnswer = x * y;
+    return;
+  }
+  if(op==="div"){
+    // divisão exata: (divisor * quociente) ÷ divisor
+    st.qText = `${x * y} ÷ ${x}`;
+    st.qAnswer = y;
+    return;
+  }
+}
+
+function pointsFor(correct, elapsed, streak){
+  // mesma conta do calc_points do main.py (só vale jogando sem servidor)
+  if(!correct) return 0;
+  const base = 10;
+  const streakBonus = clamp(streak, 0, 10) * 2;
+  let speedBonus = 0;
+  if(st.timeLimit > 0){
+    speedBonus = Math.max(0, Math.floor((st.timeLimit - elapsed) * 2));
+  }
+  return base + streakBonus + speedBonus;
+}
+
+// ---------- conferência no servidor ----------
+// Cada resposta vai pro /api/answer com o token da questão; o servidor mede
+// o tempo, pontua e só então diz a resposta certa. Sem servidor, confere aqui.
+async function judge(value){
+  const elapsedMs = Date.now() - st.qStart;
+  if(!st.token){
+    const ok = value !== null && value === st.qAnswer;
+    const gained = pointsFor(ok, elapsedMs/1000, st.streak + 1);
+    return {
+      correct: ok,
+      timeout: value === null && st.timeLimit > 0 && elapsedMs >= st.timeLimit*1000,
+      expected: st.qAnswer,
+      gained,
+      elapsed_ms: elapsedMs,
+      score: st.score + gained,
+      level: computeLevel(st.score + gained),
+    };
+  }
+  st.busy = true;
+  lockGameUI(true);
+  const r = await postJSON("/api/answer", {token: st.token, answer: value});
+  st.busy = false;
+  if(r) st.token = r.token;
+  return r;
+}
+
+function stopTimer(){
+  if(st.timer){ clearInterval(st.timer); st.timer=null; }
+}
+
+function startTimer(){
+  stopTimer();
+  const meter = $("meter");
+  meter.style.transform = "scaleX(1)";
+  if(st.timeLimit <= 0) return;
+
+  const started = st.qStart;
+  st.timer = setInterval(()=>{
+    const elapsed = (Date.now() - started) / 1000;
+    const ratio = clamp(1 - (elapsed / st.timeLimit), 0, 1);
+    meter.style.transform = `scaleX(${ratio})`;
+
+    if(elapsed >= st.timeLimit){
+      // time over
+      stopTimer();
+      answer(null, "⏱️ Tempo esgotado!");
+    }
+  }, 80);
+}
+
+function render(){
+  $("stName").textContent = st.name || "—";
+  $("stScore").textContent = st.score;
+  $("stStreak").textContent = st.streak;
+  $("stLives").textContent = st.lives;
+  $("stRound").textContent = st.round;
+  $("stRounds").textContent = st.roundsTotal;
+  $("stLevel").textContent = st.level;
+  $("q").textContent = st.qText || "—";
+  $("stModeDiff").textContent = `${MODES[st.mode]} • ${DIFFS[st.diff].label} • ${st.timeLimit>0 ? st.timeLimit+"s" : "sem tempo"}`;
+}
+
+function lockGameUI(locked){
+  $("btnSend").disabled = locked;
+  $("btnNext").disabled = locked;
+  $("ans").disabled = locked;
+}
+
+function newRound(){
+  if(st.round >= st.roundsTotal){
+    endGame("🏁 Partida finalizada!");
+    return;
+  }
+
+  st.round += 1;
+  makeQuestion();
+  st.qStart = Date.now();
+  $("ans").value = "";
+  lockGameUI(false);
+  $("ans").focus();
+  render();
+  startTimer();
+}
+
+async function answer(value, reason, skipped=false){
+  if(st.busy || st.over) return;
+  stopTimer();
+  const r = await judge(value);
+  if(st.over) return;  // desistiu enquanto esperava o servidor
+  if(!r){
+    st.token = null;
+    endGame("⚠️ Servidor não respondeu.");
+    return;
+  }
+  st.played += 1;
+  st.score = r.score;
+  st.level = r.level;
+  if(r.correct){
+    st.streak += 1;
+    beep("ok");
+    setMsg(`✅ Correto! +${r.gained} pts (tempo ${(r.elapsed_ms/1000).toFixed(1)}s)`, "ok");
+  }else{
+    // pular zera a sequência (o servidor conta como erro), mas não tira vida
+    st.streak = 0;
+    if(!skipped) st.lives -= 1;
+    beep("bad");
+    setMsg(`${reason} ❌ Correto: ${r.expected}`, "bad");
+  }
+  render();
+  if(st.lives <= 0){
+    endGame("💀 Fim de jogo. Sem vidas.");
+    return;
+  }
+  // a próxima já aparece junto com o resultado: o relógio do servidor
+  // começou a contar quando ele respondeu
+  newRound();
+}
+
+function submit(){
+  if(st.busy || st.over) return;
+  const raw = $("ans").value.trim();
+  if(!raw){ setMsg("Digite uma resposta.", "bad"); return; }
+  const n = Number(raw);
+  if(!Number.isFinite(n)){ setMsg("Resposta inválida.", "bad"); return; }
+  answer(Number.isInteger(n) ? n : null, "Errou!");
+}
+
+function endGame(msg){
+  if(st.over) return;
+  st.over = true;
+  stopTimer();
+  lockGameUI(true);
+  setMsg(msg + ` Pontos: ${st.score}`, st.lives>0 ? "ok":"bad");
+  // o placar que vale está no último token; parou antes do fim, o servidor
+  // fecha a partida (forfeit) e o token fechado vai pro ranking global (ou só
+  // pro navegador, se o servidor não responder)
+  const named = (st.name || "").trim().length >= 2;
+  const token = st.played > 0 ? st.token : null;
+  const early = st.played < st.roundsTotal;
+  st.token = null;
+  (async ()=>{
+    const local = {
+      name: st.name,
+      score: st.score,
+      modeLabel: MODES[st.mode],
+      diffLabel: DIFFS[st.diff].label,
+      rounds: st.roundsTotal,
+      level: st.level,
+      ts: Date.now()
+    };
+    if(!named) return;
+    let done = token;
+    if(done && early){
+      const f = await postJSON("/api/answer", {token: done, forfeit: true});
+      done = f && f.token;
+    }
+    const r = done && await postJSON("/api/scores", {name: st.name, token: done});
+    if(r) renderRank();
+    else if(token || !st.questions) addRank(local);
+  })();
+}
+
+async function fetchQuestions(){
+  // textos das questões da partida (sem as respostas) + token assinado da 1ª
+  const params = new URLSearchParams({
+    mode: st.mode, max: DIFFS[st.diff].max, n: st.roundsTotal,
+    time_limit: st.timeLimit, name: st.name,
+  });
+  try{
+    const res = await fetch(`/api/game?${params}`);
+    if(!res.ok) return;
+    const batch = await res.json();
+    st.questions = batch.q;
+    st.token = batch.token;
+  }catch(e){
+    // sem servidor: makeQuestion cai no gerador local
+  }
+}
+
+async function startGame(){
+  st.name = $("name").value.trim().slice(0,24);
+  st.mode = $("mode").value;
+  st.diff = $("diff").value;
+  st.roundsTotal = Number($("rounds").value) || 10;
+  st.timeLimit = Number($("timeLimit").value) || 0;
+
+  st.score = 0;
+  st.streak = 0;
+  st.lives = 3;
+  st.round = 0;
+  st.level = 1;
+  st.qText = "—";
+  st.qAnswer = null;
+  st.qStart = 0;
+  st.perms = {};
+  st.questions = null;
+  st.token = null;
+  st.played = 0;
+  st.busy = false;
+  st.over = false;
+
+  $("btnPlay").disabled = true;
+  await fetchQuestions();
+  $("btnPlay").disabled = false;
+
+  render();
+  setMsg("Boa! Começou. Responda e aperte Enter 😄", "ok");
+  newRound();
+}
+
+function resetAll(){
+  stopTimer();
+  localStorage.removeItem(RKEY);
+  renderRank();
+  setMsg("Reset geral feito (ranking local apagado).", "ok");
+}
+
+$("btnPlay").addEventListener("click", startGame);
+$("btnSend").addEventListener("click", submit);
+$("btnNext").addEventListener("click", ()=> answer(null, "⏭️ Pulou.", true));
+$("btnGiveUp").addEventListener("click", ()=> endGame("🏳️ Você desistiu."));
+$("btnResetAll").addEventListener("click", resetAll);
+$("ans").addEventListener("keydown", (e)=>{ if(e.key==="Enter") submit(); });
+
+renderRank();
+startLive();
+render();
+setMsg("Configure e clique em Jogar.", "");